@@ -1,33 +1,85 @@
 import dash
-from dash import html, dcc, Input, Output, State, callback, dash_table
+from dash import html, dcc, Input, Output, State, callback, dash_table, ctx, DiskcacheManager
 import dash_bootstrap_components as dbc
-import boto3
+import diskcache
+import plotly.graph_objects as go
 import pandas as pd
-import json
-from decimal import Decimal
-import base64
-import io
+import os
+import time
+
+from operations.convert import items_to_frame
+from operations.catalog import TableCatalog
+from operations.dynamodb_ops import LazyConnection, batch_write
+from operations.warmup import Warmup, import_modules, register_readiness_route
+from operations.async_ops import async_callback, async_client, wait_for_table_async
+from operations.staging import upload_store
+from operations.ingest import count_rows, iter_csv_items, profile_csv
+from operations.uploads import UPLOAD_SCRIPT, upload_input, register_upload_routes
+from operations.rollups import RollupAccumulator, rollups_for, write_rollups, summary_table_name
+from operations.capacity import measure_items, plan_capacity, table_billing_args, provisioned_for_load
+from operations.cache import result_cache, describe_table
+from operations.paging import fetch_page
+from operations.export import register_export_route, export_query_string, bundle_query_string
+from operations.bundle import export_progress
+from operations.query import build_read, index_options, sort_pushed_down, attribute_types, filter_types
+from operations.filters import is_number_column
+from operations.mirror import TableMirror, change_feed_from_config
+from operations.analytics import (
+    VARIETY_COLUMN, WEEK_COLUMN, load_growth_frame_async, measure_columns, cell_stats, two_way_anova, levene,
+    memoized, memoized_async
+)
+from operations.indexes import (
+    access_log, access_pattern, recommend_indexes, unused_indexes, create_index_async, drop_index_async
+)
+
+# 長時間的工作 (建立表格並上傳資料) 以背景回調執行，不佔用處理請求的 worker
+background_cache = diskcache.Cache(os.environ.get("DASH_CACHE_DIR", "./cache"))
+background_callback_manager = DiskcacheManager(background_cache)
 
 # 初始化 Dash 應用程式，加入 suppress_callback_exceptions=True
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], external_scripts=[UPLOAD_SCRIPT],
+                suppress_callback_exceptions=True, background_callback_manager=background_callback_manager)
 app.title = "Dash project for Amazon Web Services DymanoDB"
 
-# AWS DynamoDB 客戶端
-dynamodb = boto3.resource('dynamodb')
-dynamodb_client = boto3.client('dynamodb')
+# 上傳後在畫面上預覽的筆數
+PREVIEW_ROWS = 50
+
+# 查看表格時每頁的筆數
+DEFAULT_PAGE_SIZE = 10
+
+# 背景上傳時回報進度的最短間隔 (秒)
+PROGRESS_INTERVAL = 0.5
+
+# 取消上傳的旗標保存時間 (秒)
+CANCEL_TTL = 3600
 
-# 處理 Decimal 類型
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# AWS DynamoDB 客戶端 (共用的連線池與重試設定，operations.dynamodb_ops)
+# 第一次使用時才建立，匯入程式時不讀取憑證也不連線
+dynamodb = LazyConnection('resource')
+dynamodb_client = LazyConnection()
 
-# **在應用啟動時載入表格列表**
-try:
-    table_options = [{"label": table, "value": table} for table in dynamodb_client.list_tables()['TableNames']]
-except Exception as e:
-    table_options = []
+# **本地鏡像：DYNAMODB_MIRROR_TABLES 中的表格從磁碟上的 Arrow 快照讀取 (需要 pyarrow)**
+# DYNAMODB_MIRROR_CHANGE_FEED=streams 時，開啟了 Stream 的表格以 DynamoDB Streams 增量更新
+table_mirror = TableMirror(dynamodb_client, change_feed=change_feed_from_config(dynamodb_client))
+
+# 在 Flask 伺服器上註冊串流 CSV 下載路由 (使用鏡像的表格直接從快照匯出)
+register_export_route(app.server, dynamodb_client, table_mirror)
+
+# 分段上傳路由：檔案直接寫入伺服器端暫存區，回調只收到 upload ID
+register_upload_routes(app.server)
+
+# **表格目錄：在背景定期載入完整的表格列表**
+table_catalog = TableCatalog(dynamodb_client).start()
+
+# **背景預熱**：建立 AWS client (讀取憑證) 並預先匯入分析 / 匯出用的選用套件
+warmup = Warmup().add(
+    "aws_client", lambda: dynamodb_client.meta
+).add(
+    "imports", import_modules("scipy.stats", "pyarrow.parquet")
+).start()
+
+# 就緒檢查：GET /ready 在預熱與表格目錄都完成後回傳 200
+register_readiness_route(app.server, warmup=warmup, catalog=table_catalog)
 
 # 應用程式介面
 app.layout = html.Div([
@@ -37,14 +89,33 @@ app.layout = html.Div([
         # **分頁設置**
         dcc.Tabs(id="tabs", value="tab-query", children=[
             dcc.Tab(label="查詢表格", value="tab-query"),
-            dcc.Tab(label="上傳表格", value="tab-upload")
+            dcc.Tab(label="上傳表格", value="tab-upload"),
+            dcc.Tab(label="創建表格", value="tab-create"),
+            dcc.Tab(label="生長分析", value="tab-analytics")
         ]),
 
-        html.Div(id="tabs-content")
+        html.Div(id="tabs-content"),
+        dcc.Interval(id="catalog-interval", interval=1000)  # 表格目錄載入完成前定期更新表格列表
     ])
 ])
 
 
+# 創建表格時的一列屬性 (名稱與型別)
+def attribute_row():
+    return dbc.Row([
+        dbc.Col(dbc.Input(placeholder="Attribute Name", type="text"), width=5),
+        dbc.Col(dbc.Select(
+            options=[
+                {"label": "String", "value": "S"},
+                {"label": "Number", "value": "N"},
+                {"label": "Binary", "value": "B"}
+            ],
+            placeholder="選擇類型"
+        ), width=4),
+        dbc.Col(dbc.Button("❌", color="danger", className="remove-attr-btn"), width=1)
+    ], className="mb-2")
+
+
 # **分頁內容回調**
 @callback(
     Output("tabs-content", "children"),
@@ -60,13 +131,20 @@ def render_tab_content(tab):
                         dbc.Col(
                             dbc.Select(
                                 id="table-select",
-                                options=table_options,  # **直接載入表格列表**
+                                options=table_catalog.options(),  # **從表格目錄載入列表**
                                 placeholder="選擇表格",
                                 className="mb-2"
                             ),
                             width=12
                         ),
                     ]),
+                    dcc.Dropdown(
+                        id="column-select",
+                        options=[],
+                        multi=True,
+                        placeholder="選擇要讀取的欄位 (不選則讀取全部欄位)",
+                        className="mb-2"
+                    ),
                     dbc.Button(
                         "查看表格內容", 
                         id="view-table-btn", 
@@ -76,6 +154,41 @@ def render_tab_content(tab):
                 ])
             ], className="mb-4"),
 
+            dbc.Card([  # 以分割鍵 / 排序鍵查詢 (Query)
+                dbc.CardBody([
+                    html.H4("依鍵值查詢", className="card-title"),
+                    dbc.Row([
+                        dbc.Col(dbc.Select(id="index-select", options=[], value="", placeholder="選擇索引"), width=4),
+                        dbc.Col(dbc.Input(id="partition-value", placeholder="分割鍵的值", type="text"), width=4),
+                    ], className="mb-2"),
+                    dbc.Row([
+                        dbc.Col(dbc.Select(
+                            id="sort-op",
+                            options=[
+                                {"label": "不限排序鍵", "value": ""},
+                                {"label": "=", "value": "eq"},
+                                {"label": "<", "value": "lt"},
+                                {"label": "<=", "value": "le"},
+                                {"label": ">", "value": "gt"},
+                                {"label": ">=", "value": "ge"},
+                                {"label": "begins_with", "value": "begins_with"},
+                                {"label": "between", "value": "between"},
+                            ],
+                            value=""
+                        ), width=4),
+                        dbc.Col(dbc.Input(id="sort-value", placeholder="排序鍵的值", type="text"), width=4),
+                        dbc.Col(dbc.Input(id="sort-value-2", placeholder="between 的第二個值", type="text"), width=4),
+                    ], className="mb-2"),
+                    dbc.Button(
+                        "執行查詢",
+                        id="run-query-btn",
+                        color="primary",
+                        className="mb-2"
+                    ),
+                    dcc.Store(id="read-request"),  # 目前的讀取參數 (Scan 或 Query)
+                ])
+            ], className="mb-4"),
+
             dbc.Card([
                 dbc.CardBody([
                     html.H4(id="table-header", children="表格內容"),
@@ -93,7 +206,14 @@ def render_tab_content(tab):
                                 'backgroundColor': '#f8f9fa',
                                 'fontWeight': 'bold'
                             },
-                            page_size=10
+                            page_current=0,
+                            page_size=DEFAULT_PAGE_SIZE,
+                            page_action='custom',  # 每頁資料由伺服器端按需讀取
+                            filter_action='custom',  # 篩選條件轉成 DynamoDB 的查詢 / 篩選運算式
+                            filter_query='',
+                            sort_action='custom',  # 依排序鍵排序時由 DynamoDB 排序
+                            sort_mode='single',
+                            sort_by=[]
                         )
                     ]),
                     dbc.Button(
@@ -101,10 +221,74 @@ def render_tab_content(tab):
                         id="download-table-btn",
                         color="success",
                         className="mb-2",
-                        n_clicks=0,
+                        external_link=True,  # 直接由 Flask 路由串流下載
                         style={'display': 'none'}  # 預設隱藏
+                    )
+                ])
+            ], className="mb-4"),
+
+            dbc.Card([  # 同時匯出多張表格 (Parquet / gzip CSV)，打包成一個 zip 檔
+                dbc.CardBody([
+                    html.H4("匯出多張表格", className="card-title"),
+                    dbc.Row([
+                        dbc.Col(dcc.Dropdown(id="bundle-tables", options=table_catalog.options(), multi=True,
+                                             placeholder="選擇要匯出的表格"), width=8),
+                        dbc.Col(dbc.Select(
+                            id="bundle-format",
+                            options=[
+                                {"label": "Parquet", "value": "parquet"},
+                                {"label": "CSV (gzip)", "value": "csv.gz"},
+                            ],
+                            value="parquet"
+                        ), width=4),
+                    ], className="mb-2"),
+                    dbc.Button(
+                        "下載壓縮檔",
+                        id="bundle-download-btn",
+                        color="success",
+                        className="mb-2",
+                        external_link=True,  # 直接由 Flask 路由串流下載
+                        disabled=True
+                    ),
+                    dcc.Store(id="bundle-job"),  # 下一次下載使用的進度 ID
+                    dcc.Store(id="bundle-active-job"),  # 正在下載的進度 ID
+                    dcc.Interval(id="bundle-progress-interval", interval=1000, disabled=True),
+                    html.Div(id="bundle-progress")
+                ])
+            ], className="mb-4"),
+
+            dbc.Card([  # 依實際的查詢方式建議要建立 / 刪除的 GSI
+                dbc.CardBody([
+                    html.H4("索引建議", className="card-title"),
+                    dbc.Button(
+                        "分析查詢紀錄",
+                        id="advise-indexes-btn",
+                        color="secondary",
+                        className="mb-2"
+                    ),
+                    dash_table.DataTable(
+                        id="index-advice",
+                        columns=[
+                            {"name": "動作", "id": "action"},
+                            {"name": "索引名稱", "id": "IndexName"},
+                            {"name": "鍵值", "id": "keys"},
+                            {"name": "投影", "id": "projection"},
+                            {"name": "查詢次數", "id": "count"},
+                        ],
+                        data=[],
+                        row_selectable='multi',
+                        selected_rows=[],
+                        style_table={'overflowX': 'auto'},
+                        style_cell={'padding': '8px', 'textAlign': 'left'}
                     ),
-                    dcc.Download(id="download-table")
+                    dcc.Store(id="index-advice-store"),  # 建議的完整內容 (建立索引時使用)
+                    dbc.Button(
+                        "套用選取的建議",
+                        id="apply-indexes-btn",
+                        color="warning",
+                        className="my-2"
+                    ),
+                    html.Div(id="index-advice-status")
                 ])
             ])
         ])
@@ -114,12 +298,9 @@ def render_tab_content(tab):
             dbc.Card([  
                 dbc.CardBody([  
                     html.H4("上傳 CSV 檔案", className="card-title"),
-                    dcc.Upload(
-                        id="upload-data",
-                        children=html.Button('點擊此處選擇檔案'),
-                        multiple=False
-                    ),
+                    upload_input("upload-data"),  # 分段上傳 (operations.uploads)，完成後寫入 upload ID
                     html.Div(id="output-data-upload"),
+                    dcc.Store(id="upload-id"),  # 伺服器端暫存檔的 upload ID
                 ])
             ], className="mb-4"),
 
@@ -142,86 +323,454 @@ def render_tab_content(tab):
                             },
                             page_size=10
                         ),
+                        # 上傳時一併計算的彙總 (寫入 <表格>_summary)，不選則使用 DYNAMODB_ROLLUPS 的宣告
+                        dbc.Row([
+                            dbc.Col(dcc.Dropdown(id="rollup-group-by", options=[], multi=True,
+                                                 placeholder="彙總的分組欄位 (選用)"), width=6),
+                            dbc.Col(dcc.Dropdown(id="rollup-measures", options=[], multi=True,
+                                                 placeholder="彙總的數值欄位"), width=6),
+                        ], className="mt-2"),
                         dbc.Button(
                             "新增此表到 AWS",
                             id="upload-to-dynamodb-btn",
                             color="primary",
                             className="mt-2",
                             style={'display': 'none'}  # 初始隱藏按鈕
-                        )
+                        ),
+                        dbc.Button(
+                            "取消上傳",
+                            id="cancel-upload-btn",
+                            color="danger",
+                            className="mt-2 ms-2",
+                            style={'display': 'none'}  # 上傳進行中才顯示
+                        ),
+                        dbc.Progress(id="upload-progress", value=0, className="mt-2", style={'display': 'none'}),
+                        html.Div(id="upload-progress-text", className="mt-1"),
+                        dcc.Store(id="loaded-table")  # 上傳完成的表格名稱 (包含彙總表)
                     ])
                 ])
             ])
         ])
 
-# 查詢表格內容回調
+    elif tab == "tab-create":
+        return html.Div([
+            dbc.Card([
+                dbc.CardBody([
+                    html.H4("創建新表格", className="card-title"),
+
+                    # 表格名稱輸入
+                    dbc.Input(id="new-table-name", placeholder="輸入表格名稱", type="text", className="mb-2"),
+
+                    # Attribute 名稱 & 類型 (第一個為 Partition Key，第二個為 Sort Key)
+                    html.Div(id="attribute-container", children=[attribute_row()]),
+
+                    # 按鈕
+                    dbc.Button("新增屬性", id="add-attribute-btn", color="secondary", className="mb-2"),
+                    dbc.Button("創建表格", id="create-table-btn", color="primary", className="mb-2 ms-2"),
+
+                    # 創建結果
+                    html.Div(id="create-table-status", className="mt-2")
+                ])
+            ])
+        ])
+
+    elif tab == "tab-analytics":
+        return html.Div([
+            dbc.Card([  # 品種 / 週數的箱型圖與 ANOVA、Levene 檢定
+                dbc.CardBody([
+                    html.H4("生長分析", className="card-title"),
+                    dbc.Row([
+                        dbc.Col(dbc.Select(id="analytics-table", options=table_catalog.options(),
+                                           placeholder="選擇表格"), width=6),
+                        dbc.Col(dbc.Select(id="analytics-measure", options=[], placeholder="選擇數值欄位"), width=6),
+                    ], className="mb-2"),
+                    dcc.Dropdown(id="analytics-varieties", options=[], multi=True, placeholder="品種", className="mb-2"),
+                    dcc.Dropdown(id="analytics-weeks", options=[], multi=True, placeholder="週數", className="mb-2"),
+                    html.Div(id="analytics-status", className="mb-2"),
+                    dcc.Graph(id="analytics-graph"),
+                    html.H5("雙因子 ANOVA", className="mt-3"),
+                    dash_table.DataTable(
+                        id="analytics-anova",
+                        columns=[],
+                        data=[],
+                        style_cell={'padding': '8px', 'textAlign': 'left'},
+                        style_header={'backgroundColor': '#f8f9fa', 'fontWeight': 'bold'}
+                    ),
+                    html.Div(id="analytics-levene", className="mt-2")
+                ])
+            ])
+        ])
+
+# **選擇表格時載入可以查詢的索引與欄位**
+# 欄位名稱取自第一頁資料 (與查看表格的第一頁共用快取) 加上鍵值屬性
+@callback(
+    Output("index-select", "options"),
+    Output("index-select", "value"),
+    Output("column-select", "options"),
+    Output("column-select", "value"),
+    Input("table-select", "value"),
+    prevent_initial_call=True
+)
+def update_query_options(table_name):
+    if not table_name:
+        return [], "", [], []
+    try:
+        description = describe_table(dynamodb_client, table_name)
+        items, _ = fetch_page(dynamodb_client.scan, table_name, 0, DEFAULT_PAGE_SIZE)
+        names = [a['AttributeName'] for a in description['AttributeDefinitions']]
+        names += [name for name in items_to_frame(items).columns if name not in names]
+        columns = [{"label": name, "value": name} for name in names]
+        return index_options(description), "", columns, []
+    except Exception:
+        return [], "", [], []
+
+
+# **決定讀取方式：「查看表格內容」為 Scan，「執行查詢」為 Query**
+@callback(
+    Output("read-request", "data"),
+    Input("view-table-btn", "n_clicks"),
+    Input("run-query-btn", "n_clicks"),
+    State("table-select", "value"),
+    State("index-select", "value"),
+    State("partition-value", "value"),
+    State("sort-op", "value"),
+    State("sort-value", "value"),
+    State("sort-value-2", "value"),
+    State("column-select", "value"),
+    prevent_initial_call=True
+)
+def set_read_request(view_clicks, query_clicks, table_name, index, partition_value, sort_op, sort_value, sort_value_2,
+                     columns):
+    request = {'table': table_name, 'clicks': (view_clicks or 0) + (query_clicks or 0),
+               'params': {'columns': columns or []}}
+    if ctx.triggered_id == "run-query-btn":
+        request['params'] = {
+            'columns': columns or [],
+            'index': index or '',
+            'partition_value': partition_value,
+            'sort_op': sort_op or '',
+            'sort_values': [sort_value, sort_value_2],
+        }
+    return request
+
+
+# 查詢表格內容回調 (伺服器端分頁)
 @callback(
     Output("table-header", "children"),
     Output("table-data", "columns"),
     Output("table-data", "data"),
+    Output("table-data", "page_current"),
+    Output("table-data", "page_count"),
     Output("download-table-btn", "style"),  # 讓按鈕顯示或隱藏
-    Input("view-table-btn", "n_clicks"),
-    State("table-select", "value"),
+    Output("download-table-btn", "href"),
+    Input("read-request", "data"),
+    Input("table-data", "page_current"),
+    Input("table-data", "page_size"),
+    Input("table-data", "filter_query"),
+    Input("table-data", "sort_by"),
     prevent_initial_call=True
 )
-def view_table_content(n_clicks, table_name):
+def view_table_content(read_request, page_current, page_size, filter_query, sort_by):
+    table_name = (read_request or {}).get('table')
     if not table_name:
-        return "請選擇表格", [], [], {'display': 'none'}
-    
+        return "請選擇表格", [], [], 0, None, {'display': 'none'}, None
+
+    # 重新查看、查詢或改變篩選 / 排序時回到第一頁 (已讀過的頁面由共用快取提供，寫入資料時會自動清除)
+    new_query = ctx.triggered_id == "read-request" or bool(ctx.triggered_prop_ids.keys() & {
+        "table-data.filter_query", "table-data.sort_by"})
+    if new_query:
+        page_current = 0
+    page_current = page_current or 0
+    params = dict(read_request['params'], filter_query=filter_query or '', sort_by=sort_by or [])
+
     try:
-        table = dynamodb.Table(table_name)
-        response = table.scan()
-        items = response.get('Items', [])
-        
-        if not items:
-            return f"表格 '{table_name}' 內容 (空表格)", [], [], {'display': 'none'}
-        
-        # 轉換為 DataFrame
-        json_items = json.loads(json.dumps(items, cls=DecimalEncoder))
-        df = pd.DataFrame(json_items)
-        
-        columns = [{"name": col, "id": col} for col in df.columns]
+        description = describe_table(dynamodb_client, table_name)
+        mirrored = table_mirror.enabled(table_name)
+        types = {} if mirrored else filter_types(dynamodb_client, description, params, page_size)
+
+        # 記錄查詢方式，作為索引建議的依據
+        if new_query:
+            access_log.record(table_name, access_pattern(params, description, types))
+
+        if mirrored:
+            # 使用本地鏡像的表格：在本地篩選 / 排序整個結果後切出這一頁，不讀取 DynamoDB
+            result = table_mirror.read(table_name, params)
+            filtered = bool(params.get('partition_value') or params.get('filter_query'))
+            item_count = len(result)
+            page_count = max(-(-item_count // page_size), 1)
+            page_current = min(page_current, page_count - 1)
+            df = result.iloc[page_current * page_size:(page_current + 1) * page_size]
+            types = {column: 'N' for column in result.columns if is_number_column(result[column])}
+        else:
+            read, kwargs = build_read(dynamodb_client, description, params, types)
+            items, has_more = fetch_page(read, table_name, page_current, page_size, **kwargs)
+
+            # 頁數使用 DescribeTable 的 ItemCount (約每 6 小時更新一次，Query 或有篩選條件時無法得知總數)，
+            # 讀到最後一頁時以實際頁數為準
+            filtered = 'KeyConditionExpression' in kwargs or 'FilterExpression' in kwargs
+            if has_more:
+                item_count = None if filtered else description['ItemCount']
+                page_count = max(-(-(item_count or 0) // page_size), page_current + 2)
+            else:
+                item_count = page_current * page_size + len(items)
+                page_count = page_current + 1
+
+            # 轉換為 DataFrame (有選擇欄位時依選擇的順序)
+            df = items_to_frame(items, params.get('columns') or None)
+            types.update(attribute_types(items))
+
+            # 不是依排序鍵排序時 DynamoDB 無法排序，只排序目前這一頁
+            if sort_by and not sort_pushed_down(kwargs, params) and sort_by[0]['column_id'] in df.columns:
+                df = df.sort_values(sort_by[0]['column_id'], ascending=sort_by[0]['direction'] == 'asc',
+                                    na_position='last')
+
+        if df.empty and page_current == 0:
+            return f"表格 '{table_name}' 內容 (沒有資料)", [], [], 0, None, {'display': 'none'}, None
+
+        # N 屬性的欄位設為 numeric，DataTable 的篩選預設為等於 (而不是 contains)
+        types.update({a['AttributeName']: a['AttributeType'] for a in description['AttributeDefinitions']})
+        columns = [dict({"name": col, "id": col}, **({"type": "numeric"} if types.get(col) == 'N' else {}))
+                   for col in df.columns]
         data = df.to_dict('records')
 
-        # 如果有資料，顯示下載按鈕
-        return f"表格 '{table_name}' 內容 ({len(data)} 筆資料)", columns, data, {'display': 'inline-block'}
+        # 如果有資料，顯示下載按鈕 (下載時會沿用已瀏覽過的頁面)
+        download_href = f"/export/{table_name}.csv?{export_query_string(page_size, params)}"
+        count_text = f"約 {item_count} 筆資料，" if item_count is not None else ""
+        mode_text = "查詢結果" if filtered else "內容"
+        return (f"表格 '{table_name}' {mode_text} ({count_text}第 {page_current + 1} 頁)",
+                columns, data, page_current, page_count, {'display': 'inline-block'}, download_href)
     
     except Exception as e:
-        return f"查詢表格 '{table_name}' 失敗: {str(e)}", [], [], {'display': 'none'}
+        return f"查詢表格 '{table_name}' 失敗: {str(e)}", [], [], 0, None, {'display': 'none'}, None
 
 
-# 下載csv檔
+# **依查詢紀錄列出索引建議**
+# 屬性型別取自第一頁資料 (與查看表格的第一頁共用快取)
 @callback(
-    Output("download-table", "data"),
-    Input("download-table-btn", "n_clicks"),
+    Output("index-advice", "data"),
+    Output("index-advice", "selected_rows"),
+    Output("index-advice-store", "data"),
+    Output("index-advice-status", "children"),
+    Input("advise-indexes-btn", "n_clicks"),
     State("table-select", "value"),
     prevent_initial_call=True
 )
-def download_table(n_clicks, table_name):
+def advise_indexes(n_clicks, table_name):
     if not table_name:
-        return dash.no_update
+        return [], [], [], "請先選擇表格"
+    try:
+        description = describe_table(dynamodb_client, table_name)
+        items, _ = fetch_page(dynamodb_client.scan, table_name, 0, DEFAULT_PAGE_SIZE)
+        patterns = access_log.patterns(table_name)
+
+        advice = [dict(recommendation, action='create')
+                  for recommendation in recommend_indexes(description, patterns, attribute_types(items))]
+        advice += [{'action': 'drop', 'IndexName': name} for name in unused_indexes(description, table_name)]
+
+        rows = []
+        for entry in advice:
+            if entry['action'] == 'create':
+                keys = entry['partition'][0] + (f", {entry['sort'][0]}" if entry['sort'] else "")
+                projection = entry['Projection']['ProjectionType']
+                if projection == 'INCLUDE':
+                    projection += f" ({', '.join(entry['Projection']['NonKeyAttributes'])})"
+                rows.append({'action': "建立", 'IndexName': entry['IndexName'], 'keys': keys,
+                             'projection': projection, 'count': entry['count']})
+            else:
+                rows.append({'action': "刪除 (未使用)", 'IndexName': entry['IndexName'], 'keys': "",
+                             'projection': "", 'count': 0})
+
+        status = f"共 {sum(count for _, count in patterns)} 次查詢紀錄"
+        if not advice:
+            status += "，目前的索引已足夠"
+        return rows, [], advice, status
+    except Exception as e:
+        return [], [], [], f"分析索引失敗: {str(e)}"
+
+
+# **線上建立 / 刪除選取的索引** (DynamoDB 會在背景回填新索引，完成後查詢才會使用)
+# (async 回調，operations.async_ops；等待期間仍佔用這個請求的執行緒)
+@async_callback(
+    Output("index-advice-status", "children", allow_duplicate=True),
+    Input("apply-indexes-btn", "n_clicks"),
+    State("index-advice", "selected_rows"),
+    State("index-advice-store", "data"),
+    State("table-select", "value"),
+    prevent_initial_call=True
+)
+async def apply_index_advice(n_clicks, selected_rows, advice, table_name):
+    if not table_name or not selected_rows:
+        return "請先選擇要套用的建議"
+
+    messages = []
+    async with async_client() as client:
+        for row in selected_rows:
+            entry = advice[row]
+            try:
+                if entry['action'] == 'create':
+                    await create_index_async(client, table_name, entry)
+                    messages.append(f"已開始建立索引 '{entry['IndexName']}'")
+                else:
+                    await drop_index_async(client, table_name, entry['IndexName'])
+                    messages.append(f"已開始刪除索引 '{entry['IndexName']}'")
+            except Exception as e:
+                messages.append(f"索引 '{entry['IndexName']}' 失敗: {str(e)}")
+            finally:
+                # 索引狀態改變，清除這張表格的 DescribeTable 與查詢快取
+                result_cache.invalidate(table_name)
+
+    return html.Ul([html.Li(message) for message in messages])
+
+
+# **選擇要打包的表格 / 格式時產生下載連結**
+# 每個連結帶一個新的進度 ID；點擊下載後改為追蹤這個 ID 的進度，並換成下一次下載用的新連結
+@callback(
+    Output("bundle-download-btn", "href"),
+    Output("bundle-download-btn", "disabled"),
+    Output("bundle-job", "data"),
+    Output("bundle-active-job", "data"),
+    Output("bundle-progress-interval", "disabled"),
+    Input("bundle-tables", "value"),
+    Input("bundle-format", "value"),
+    Input("bundle-download-btn", "n_clicks"),
+    State("bundle-job", "data"),
+    prevent_initial_call=True
+)
+def update_bundle_link(table_names, fmt, n_clicks, job_id):
+    if not table_names:
+        return None, True, None, dash.no_update, dash.no_update
+
+    next_job = export_progress.new_job()
+    href = f"/export/bundle.zip?{bundle_query_string(table_names, fmt, next_job)}"
+    if ctx.triggered_id == "bundle-download-btn" and job_id:
+        return href, False, next_job, job_id, False
+    return href, False, next_job, dash.no_update, dash.no_update
+
+
+# **每張表格的匯出進度** (筆數以 DescribeTable 的 ItemCount 估計)，全部完成後停止更新
+@callback(
+    Output("bundle-progress", "children"),
+    Output("bundle-progress-interval", "disabled", allow_duplicate=True),
+    Input("bundle-progress-interval", "n_intervals"),
+    State("bundle-active-job", "data"),
+    prevent_initial_call=True
+)
+def update_bundle_progress(n_intervals, job_id):
+    progress = export_progress.get(job_id) if job_id else {}
+    if not progress:
+        return "準備匯出...", False
+
+    rows = []
+    for table_name, state in progress.items():
+        try:
+            total = describe_table(dynamodb_client, table_name)['ItemCount']
+        except Exception:
+            total = 0
+        done = state['status'] == 'done'
+        value = 100 if done else min(int(state.get('rows', 0) * 100 / total), 99) if total else 0
+        label = f"{table_name}: {state['status']} ({state.get('rows', 0)} 筆)"
+        if state.get('error'):
+            label += f" - {state['error']}"
+        rows.append(html.Div([
+            html.Div(label),
+            dbc.Progress(value=value, color="danger" if state['status'] == 'failed' else "success",
+                         className="mb-2")
+        ]))
+    finished = all(state['status'] in ('done', 'failed') for state in progress.values())
+    return rows, finished
+
+
+# 分析用的資料 (依表格版本記住，切換品種 / 週數時不會重新掃描)
+# 掃描以 async client 進行，各分段同時等待 DynamoDB 回應
+async def growth_frame(table_name):
+    version = table_mirror.version(table_name) if table_mirror.enabled(table_name) else 0
 
+    async def load():
+        async with async_client() as client:
+            return await load_growth_frame_async(client, table_name, table_mirror)
+
+    frame = await memoized_async(table_name, version, ['frame'], load)
+    return frame, version
+
+
+# **選擇分析的表格時載入數值欄位、品種與週數**
+@async_callback(
+    Output("analytics-measure", "options"),
+    Output("analytics-measure", "value"),
+    Output("analytics-varieties", "options"),
+    Output("analytics-varieties", "value"),
+    Output("analytics-weeks", "options"),
+    Output("analytics-weeks", "value"),
+    Output("analytics-status", "children"),
+    Input("analytics-table", "value"),
+    prevent_initial_call=True
+)
+async def load_analytics_options(table_name):
+    if not table_name:
+        return [], None, [], [], [], [], ""
     try:
-        table = dynamodb.Table(table_name)
-        response = table.scan()
-        items = response.get('Items', [])
+        df, _ = await growth_frame(table_name)
+        if VARIETY_COLUMN not in df.columns or WEEK_COLUMN not in df.columns:
+            return [], None, [], [], [], [], f"表格 '{table_name}' 沒有 {VARIETY_COLUMN} / {WEEK_COLUMN} 欄位"
+
+        measures = measure_columns(df)
+        varieties = sorted(df[VARIETY_COLUMN].dropna().unique().tolist())
+        weeks = sorted(df[WEEK_COLUMN].dropna().unique().tolist())
+        return ([{"label": m, "value": m} for m in measures], "height" if "height" in measures else measures[0],
+                [{"label": v, "value": v} for v in varieties], varieties,
+                [{"label": f"第 {w} 週", "value": w} for w in weeks], weeks,
+                f"共 {len(df)} 筆資料")
+    except Exception as e:
+        return [], None, [], [], [], [], f"讀取表格 '{table_name}' 失敗: {str(e)}"
 
-        if not items:
-            return dash.no_update  # 空表格，不執行下載
 
-        # 轉換為 DataFrame
-        json_items = json.loads(json.dumps(items, cls=DecimalEncoder))
-        df = pd.DataFrame(json_items)
+# **箱型圖、ANOVA 與 Levene 檢定**
+# 每個 (品種, 週數) 的統計量整張表格只計算一次，切換品種或週數時只從中選取，
+# ANOVA 也直接由這些統計量計算，不需要重新擬合
+@async_callback(
+    Output("analytics-graph", "figure"),
+    Output("analytics-anova", "columns"),
+    Output("analytics-anova", "data"),
+    Output("analytics-levene", "children"),
+    Input("analytics-measure", "value"),
+    Input("analytics-varieties", "value"),
+    Input("analytics-weeks", "value"),
+    State("analytics-table", "value"),
+    prevent_initial_call=True
+)
+async def update_analytics(measure, varieties, weeks, table_name):
+    if not table_name or not measure or not varieties or not weeks:
+        return go.Figure(), [], [], ""
+    try:
+        df, version = await growth_frame(table_name)
+        cells = memoized(table_name, version, ['cells', measure], lambda: cell_stats(df, measure))
+        selected = cells[cells[VARIETY_COLUMN].isin(varieties) & cells[WEEK_COLUMN].isin(weeks)]
 
-        # 轉換為 CSV 字串
-        csv_string = df.to_csv(index=False, encoding="utf-8-sig")
+        figure = go.Figure()
+        for variety, group in selected.groupby(VARIETY_COLUMN, sort=False):
+            figure.add_trace(go.Box(
+                name=str(variety),
+                x=group[WEEK_COLUMN].astype(str),
+                q1=group['q1'], median=group['median'], q3=group['q3'],
+                lowerfence=group['lowerfence'], upperfence=group['upperfence'],
+                mean=group['mean']
+            ))
+        figure.update_layout(boxmode='group', xaxis_title="週數", yaxis_title=measure,
+                             title=f"{measure} distribution", legend_title="品種")
 
-        # 回傳 CSV 下載
-        return dcc.send_string(csv_string, filename=f"{table_name}.csv")
+        key = [measure, tuple(sorted(varieties)), tuple(sorted(weeks))]
+        anova = memoized(table_name, version, ['anova'] + key, lambda: two_way_anova(selected))
+        statistic, p_value = memoized(table_name, version, ['levene'] + key, lambda: levene(
+            df[df[VARIETY_COLUMN].isin(varieties) & df[WEEK_COLUMN].isin(weeks)], measure))
 
+        columns = [{"name": col, "id": col} for col in anova.columns]
+        anova = anova.round({'sum_sq': 4, 'F': 4})  # p-value 可能非常小，不四捨五入
+        data = anova.astype(object).where(anova.notna(), None).to_dict('records')
+        levene_text = f"Levene's Test 統計值: {statistic:.4f}"
+        levene_text += f", p-value: {p_value:.4g}" if p_value == p_value else " (安裝 scipy 後顯示 p-value)"
+        return figure, columns, data, levene_text
     except Exception as e:
-        print(f"下載表格失敗: {str(e)}")
-        return dash.no_update
+        return go.Figure(), [], [], f"分析失敗: {str(e)}"
 
 
 # **上傳 CSV 檔案回調**
@@ -230,59 +779,87 @@ def download_table(n_clicks, table_name):
     Output("uploaded-table-data", "columns"),
     Output("uploaded-table-data", "data"),
     Output("upload-to-dynamodb-btn", "style"),  # 顯示/隱藏按鈕
-    Input("upload-data", "contents"),
-    State("upload-data", "filename"),
+    Output("upload-id", "data"),
+    Input("upload-data", "data"),
     prevent_initial_call=True
 )
-def upload_file(contents, filename):
-    if contents is None:
-        return "請上傳 CSV 檔案", [], [], {'display': 'none'}  # 隱藏按鈕
+def upload_file(upload):
+    if not upload:
+        return "請上傳 CSV 檔案", [], [], {'display': 'none'}, None  # 隱藏按鈕
 
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
+    filename, upload_id = upload['filename'], upload['upload_id']
     try:
-        # 嘗試讀取 CSV 檔案
-        df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+        # 檔案已經分段寫入伺服器端暫存區，瀏覽器只保留 upload ID 與預覽
+        if not upload_store.complete(upload_id):
+            raise ValueError("檔案尚未上傳完成")
+        path = upload_store.path(upload_id)
+
+        # 只讀取前幾筆作為預覽，總筆數以行數計算
+        df = pd.read_csv(path, nrows=PREVIEW_ROWS)
+        row_count = count_rows(path)
         columns = [{"name": col, "id": col} for col in df.columns]
         data = df.to_dict('records')
 
         # 顯示「新增此表到 AWS」按鈕
-        return f"上傳的表格: {filename} ({len(data)} 筆資料)", columns, data, {'display': 'inline-block'}
+        return (f"上傳的表格: {filename} (約 {row_count} 筆資料，預覽前 {len(data)} 筆)",
+                columns, data, {'display': 'inline-block'}, upload_id)
 
     except Exception as e:
-        return f"讀取檔案失敗: {str(e)}", [], [], {'display': 'none'}
+        return f"讀取檔案失敗: {str(e)}", [], [], {'display': 'none'}, None
 
 
-# 上傳資料到 DynamoDB
+# 上傳資料到 DynamoDB (背景回調：顯示進度，可以取消)
 @callback(
     Output("upload-to-dynamodb-btn", "children"),
+    Output("loaded-table", "data"),
     Input("upload-to-dynamodb-btn", "n_clicks"),
-    State("uploaded-table-data", "data"),
-    State("uploaded-table-data", "columns"),
-    State("upload-data", "filename"),
+    State("upload-id", "data"),
+    State("rollup-group-by", "value"),
+    State("rollup-measures", "value"),
+    background=True,
+    running=[
+        (Output("upload-to-dynamodb-btn", "disabled"), True, False),
+        (Output("cancel-upload-btn", "style"), {'display': 'inline-block'}, {'display': 'none'}),
+        (Output("upload-progress", "style"), {'display': 'flex'}, {'display': 'none'}),
+    ],
+    progress=[Output("upload-progress", "value"), Output("upload-progress-text", "children")],
     prevent_initial_call=True
 )
-def upload_to_dynamodb(n_clicks, data, columns, filename):
-    if not data:
-        return "沒有資料可以上傳"
+def upload_to_dynamodb(set_progress, n_clicks, upload_id, rollup_group_by, rollup_measures):
+    if not upload_id:
+        return "沒有資料可以上傳", dash.no_update
+
+    # 取消旗標由 cancel_upload 在主程式設定 (見 cancel_upload)
+    cancel_key = ("cancel-upload", upload_id)
+    background_cache.delete(cancel_key)
     
     try:
-        # 1. **表格名稱來自 CSV 檔案名稱**
+        # 1. **從伺服器端暫存區讀取資料，表格名稱來自 CSV 檔案名稱**
+        filename = upload_store.metadata(upload_id)['filename']
+        path = upload_store.path(upload_id)
         table_name = filename.split('.')[0]  # 去除副檔名，取得表格名稱
         
         # 2. **檢查表格是否已存在**
-        existing_tables = dynamodb_client.list_tables()['TableNames']
-        if table_name in existing_tables:
-            return "表格已存在，請選擇其他名稱"
+        if table_catalog.exists(table_name):
+            return "表格已存在，請選擇其他名稱", dash.no_update
+
+        # 彙總在寫入資料時逐區塊累計，完成後寫入 <表格>_summary
+        rollups = RollupAccumulator(rollups_for(table_name, rollup_group_by, rollup_measures))
+        if rollups.specs and table_catalog.exists(summary_table_name(table_name)):
+            return f"彙總表 '{summary_table_name(table_name)}' 已存在，請選擇其他名稱", dash.no_update
         
-        # 3. **確保每筆資料都有唯一的 `ID` 作為 Partition Key**
+        # 3. **每筆資料都有唯一的 `ID` 作為 Partition Key (讀取時從 1 開始遞增)**
         partition_key = "ID"
-        for index, item in enumerate(data, start=1):  
-            item[partition_key] = index  # 設置 ID 為唯一數字（從 1 開始遞增）
 
-        # 4. **計算 ProvisionedThroughput（根據資料大小設置吞吐量）**
-        read_capacity = len(data) // 100 + 1  # 每 100 筆資料設為 1 的讀取容量
-        write_capacity = len(data) // 100 + 1  # 每 100 筆資料設為 1 的寫入容量
+        # 4. **先掃描整個 CSV 決定每個欄位的型別 (每個區塊都轉成同一個型別) 與資料列數，
+        #    再依抽樣的項目大小計算容量（上傳期間的 WCU 或 PAY_PER_REQUEST）**
+        set_progress((0, "正在檢查 CSV 欄位型別..."))
+        profile = profile_csv(path)
+        row_count = profile['rows']
+        sizes = measure_items(iter_csv_items(path, id_column=partition_key, schema=profile['schema']))
+        plan = plan_capacity(row_count, sizes)
+        if background_cache.get(cancel_key):
+            return "已取消上傳", dash.no_update
 
         # 5. **創建 DynamoDB 表格**
         table = dynamodb.create_table(
@@ -293,39 +870,188 @@ def upload_to_dynamodb(n_clicks, data, columns, filename):
             AttributeDefinitions=[
                 {'AttributeName': partition_key, 'AttributeType': 'N'}  # `ID` 設為數字 (Number)
             ],
-            ProvisionedThroughput={
-                'ReadCapacityUnits': read_capacity,
-                'WriteCapacityUnits': write_capacity
-            }
+            **table_billing_args(plan)
         )
 
         # 6. **等待表格創建完成**
+        set_progress((0, f"正在建立表格 '{table_name}'..."))
         table.meta.client.get_waiter('table_exists').wait(TableName=table_name)
 
-        # 7. **上傳資料到 DynamoDB**
-        with table.batch_writer() as batch:
-            for item in data:
-                batch.put_item(Item={k: Decimal(v) if isinstance(v, (int, float)) else v for k, v in item.items()})
+        # 7. **逐區塊解析 CSV、整欄轉成 DynamoDB 格式後立即交給多執行緒 BatchWriteItem 寫入，定期回報進度**
+        last_report = 0
+
+        def report(rows, elapsed):
+            nonlocal last_report
+            if time.monotonic() - last_report < PROGRESS_INTERVAL:
+                return
+            last_report = time.monotonic()
+            rate = rows / elapsed if elapsed > 0 else 0
+            eta = (row_count - rows) / rate if rate > 0 else 0
+            set_progress((
+                min(rows / max(row_count, 1) * 100, 100),
+                f"已寫入 {rows} / {row_count} 筆，{rate:.0f} 筆/秒，預計剩餘 {eta:.0f} 秒"
+            ))
+
+        # 寫入完成後把 WCU 降回平時的容量
+        # 寫入速度限制在表格 WCU 的一定比例內 (DYNAMODB_WRITE_PERCENT)
+        with provisioned_for_load(dynamodb_client, table_name, plan):
+            items = iter_csv_items(path, id_column=partition_key, on_chunk=rollups.update,
+                                   schema=profile['schema'])
+            stats = batch_write(dynamodb_client, table_name, items, on_progress=report,
+                                should_stop=lambda: background_cache.get(cancel_key, False))
+        if stats['cancelled']:
+            background_cache.delete(cancel_key)
+            return f"已取消上傳，表格 '{table_name}' 已寫入 {stats['rows']} 筆", [table_name]
+        set_progress((100, f"已寫入 {stats['rows']} 筆，共 {stats['seconds']:.1f} 秒"))
+
+        # 8. **寫入彙總表**
+        loaded = [table_name]
+        summary_name = write_rollups(dynamodb_client, table_name, rollups)
+        if summary_name:
+            loaded.append(summary_name)
 
-            
-        return f"資料已成功上傳到 DynamoDB 表格 '{table_name}'！"
+        # 9. **清除上傳暫存檔 (目錄與快取由主程式在 on_table_loaded 更新)**
+        upload_store.discard(upload_id)
+
+        summary_text = f"，彙總已寫入 '{summary_name}'" if summary_name else ""
+        return (f"資料已成功上傳到 DynamoDB 表格 '{table_name}'！"
+                f"({stats['rows']} 筆，{stats['rows_per_second']:.0f} 筆/秒{summary_text})"), loaded
     
     except Exception as e:
-        return f"上傳失敗: {str(e)}"
+        return f"上傳失敗: {str(e)}", dash.no_update
+
+
+# **取消上傳**
+# 不使用背景回調的 cancel (會直接終止背景行程，provisioned_for_load 的 finally 不會執行，
+# 表格會一直停留在上傳期間的 WCU)；改為設定取消旗標，背景行程停止送出新的批次、降回平時的容量後結束
+@callback(
+    Output("upload-progress-text", "children", allow_duplicate=True),
+    Input("cancel-upload-btn", "n_clicks"),
+    State("upload-id", "data"),
+    prevent_initial_call=True
+)
+def cancel_upload(n_clicks, upload_id):
+    if not upload_id:
+        return dash.no_update
+    background_cache.set(("cancel-upload", upload_id), True, expire=CANCEL_TTL)
+    return "正在取消上傳..."
+
+
+# 背景回調在另一個行程執行，上傳完成後在主程式更新表格目錄並清除這張表格的查詢快取
+@callback(
+    Output("upload-progress-text", "children", allow_duplicate=True),
+    Input("loaded-table", "data"),
+    prevent_initial_call=True
+)
+def on_table_loaded(table_names):
+    for table_name in table_names:
+        table_catalog.add(table_name)
+        result_cache.invalidate(table_name)
+    return dash.no_update
+
+
+# 預覽上傳的檔案後，以欄位名稱作為彙總的選項
+@callback(
+    Output("rollup-group-by", "options"),
+    Output("rollup-measures", "options"),
+    Input("uploaded-table-data", "columns"),
+    prevent_initial_call=True
+)
+def update_rollup_options(columns):
+    options = [{"label": col["name"], "value": col["id"]} for col in columns or []]
+    return options, options
+
+
+# **允許新增多個 Attribute**
+@callback(
+    Output("attribute-container", "children"),
+    Input("add-attribute-btn", "n_clicks"),
+    State("attribute-container", "children"),
+    prevent_initial_call=True
+)
+def add_attribute_field(n_clicks, existing_children):
+    return existing_children + [attribute_row()]
+
+
+# **創建表格回調** (async 回調，等待表格變成 ACTIVE)
+@async_callback(
+    Output("create-table-status", "children"),
+    Input("create-table-btn", "n_clicks"),
+    State("new-table-name", "value"),
+    State("attribute-container", "children"),
+    prevent_initial_call=True
+)
+async def create_empty_table(n_clicks, table_name, attributes):
+    if not table_name:
+        return "⚠️ 請輸入表格名稱！"
+
+    if not attributes:
+        return "⚠️ 至少需要一個 Attribute！"
+
+    try:
+        attribute_definitions = []
+        key_schema = []
+
+        for attr in attributes:
+            attr_name = attr["props"]["children"][0]["props"]["children"]["props"].get("value")
+            attr_type = attr["props"]["children"][1]["props"]["children"]["props"].get("value")
+
+            if not attr_name or not attr_type:
+                return "⚠️ 所有屬性名稱和類型都必須填寫！"
+
+            attribute_definitions.append({"AttributeName": attr_name, "AttributeType": attr_type})
+
+            # 第一個欄位為 Partition Key，第二個為 Sort Key（如果有的話）
+            if len(key_schema) == 0:
+                key_schema.append({"AttributeName": attr_name, "KeyType": "HASH"})
+            elif len(key_schema) == 1:
+                key_schema.append({"AttributeName": attr_name, "KeyType": "RANGE"})
+
+        # DynamoDB 只接受鍵值屬性的 AttributeDefinitions，其他屬性在寫入資料時才決定
+        key_names = {key["AttributeName"] for key in key_schema}
+        async with async_client() as client:
+            await client.create_table(
+                TableName=table_name,
+                KeySchema=key_schema,
+                AttributeDefinitions=[a for a in attribute_definitions if a["AttributeName"] in key_names],
+                ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5}
+            )
+            await wait_for_table_async(client, table_name)
+        table_catalog.add(table_name)
+        return f"✅ 表格 '{table_name}' 創建成功！"
+
+    except Exception as e:
+        return f"❌ 創建表格失敗: {str(e)}"
+
     
-# **當切換到查詢表格時，更新可選的表格列表**
+# 切換到 tab 這個分頁或表格目錄載入完成時回傳表格列表，否則不更新
+def catalog_options(tab, visible_tab):
+    if ctx.triggered_id == "catalog-interval" and not table_catalog.loaded:
+        return dash.no_update
+    return table_catalog.options() if tab == visible_tab else dash.no_update
+
+
+# **當切換到查詢表格或表格目錄載入完成時，更新可選的表格列表 (查詢與匯出)**
 @callback(
     Output("table-select", "options"),
-    Input("tabs", "value")
+    Output("bundle-tables", "options"),
+    Output("catalog-interval", "disabled"),
+    Input("tabs", "value"),
+    Input("catalog-interval", "n_intervals")
 )
-def update_table_options(tab):
-    if tab == "tab-query":
-        try:
-            table_names = dynamodb_client.list_tables()['TableNames']
-            return [{"label": table, "value": table} for table in table_names]
-        except Exception as e:
-            return []
-    return dash.no_update  # 其他分頁時不更新
+def update_table_options(tab, n_intervals):
+    options = catalog_options(tab, "tab-query")
+    return options, options, table_catalog.loaded
+
+
+# **生長分析分頁的表格列表**
+@callback(
+    Output("analytics-table", "options"),
+    Input("tabs", "value"),
+    Input("catalog-interval", "n_intervals")
+)
+def update_analytics_table_options(tab, n_intervals):
+    return catalog_options(tab, "tab-analytics")
 
 
 if __name__ == '__main__':
@@ -1,21 +1,43 @@
 import dash
 from dash import dcc, html, Input, Output, State, dash_table, ctx
 import pandas as pd
-import boto3
-import io
-import base64
 
+from operations.convert import items_to_frame
+from operations.export import register_export_route
+from operations.cache import result_cache, describe_table
+from operations.catalog import TableCatalog
+from operations.dynamodb_ops import LazyConnection, scan_table, batch_write
+from operations.staging import upload_store
+from operations.ingest import iter_csv_items, infer_types, profile_csv
+from operations.uploads import UPLOAD_SCRIPT, upload_input, register_upload_routes
+from operations.capacity import (
+    measure_items, plan_capacity, table_billing_args, provisioned_for_load
+)
 
 # 初始化 Dash 應用
-app = dash.Dash(__name__, suppress_callback_exceptions=True)
+app = dash.Dash(__name__, external_scripts=[UPLOAD_SCRIPT], suppress_callback_exceptions=True)
+
+# 創建 AWS DynamoDB 資源 (共用的連線池與重試設定，operations.dynamodb_ops)
+# 第一次使用時才建立，匯入程式時不讀取憑證也不連線
+dynamodb = LazyConnection('resource', 'us-east-1')
+dynamodb_client = LazyConnection('client', 'us-east-1')
+
+# 在 Flask 伺服器上註冊串流 CSV 下載路由
+register_export_route(app.server, dynamodb_client)
+
+# 分段上傳路由 (檔案直接寫入伺服器端暫存區)
+register_upload_routes(app.server)
 
-# 創建 AWS DynamoDB 資源
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+# 表格目錄 (在背景定期載入完整的表格列表)
+table_catalog = TableCatalog(dynamodb_client).start()
 
-def create_table(dynamodb, table_name, column_names):
+# 只建立表格本身的鍵值；GSI 依實際的查詢方式由索引建議 (operations.indexes) 線上建立，
+# 不再為每個欄位各建一個 GSI (每次寫入都會被放大成欄位數倍，超過 20 個欄位時也無法建立)
+# column_types 為 {欄位: DynamoDB 型別}，前兩個欄位為 Partition Key 與 Sort Key
+def create_table(dynamodb, table_name, column_types, plan):
+    column_names = list(column_types)
     Partition_Key = column_names[0]
     Sort_Key = column_names[1]
-    other_columns = column_names[2:]
     
     key_schema = [
         {'AttributeName': Partition_Key, 'KeyType': 'HASH'},
@@ -23,31 +45,15 @@ def create_table(dynamodb, table_name, column_names):
     ]
     
     attribute_definitions = [
-        {'AttributeName': Partition_Key, 'AttributeType': 'S'},
-        {'AttributeName': Sort_Key, 'AttributeType': 'N'}
+        {'AttributeName': Partition_Key, 'AttributeType': column_types[Partition_Key]},
+        {'AttributeName': Sort_Key, 'AttributeType': column_types[Sort_Key]}
     ]
     
-    for col in other_columns:
-        attribute_definitions.append({'AttributeName': col, 'AttributeType': 'S'})
-    
-    global_secondary_indexes = []
-    for col in other_columns:
-        global_secondary_indexes.append({
-            'IndexName': f"{col}_Index",
-            'KeySchema': [
-                {'AttributeName': col, 'KeyType': 'HASH'},
-                {'AttributeName': Sort_Key, 'KeyType': 'RANGE'}
-            ],
-            'Projection': {'ProjectionType': 'ALL'},
-            'ProvisionedThroughput': {'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5}
-        })
-    
     table = dynamodb.create_table(
         TableName=table_name,
         KeySchema=key_schema,
         AttributeDefinitions=attribute_definitions,
-        ProvisionedThroughput={'ReadCapacityUnits': 5, 'WriteCapacityUnits': 5},
-        GlobalSecondaryIndexes=global_secondary_indexes
+        **table_billing_args(plan)
     )
     
     return table
@@ -61,7 +67,8 @@ app.layout = html.Div([
         dcc.Tab(label='CSV 上傳', value='tab-2'),
     ]),
 
-    html.Div(id='tabs-content')
+    html.Div(id='tabs-content'),
+    dcc.Interval(id='catalog-interval', interval=1000)  # 表格目錄載入完成前定期更新表格列表
 ], style={
     'fontFamily': 'Arial, sans-serif',
     'backgroundColor': '#f4f6f8',
@@ -76,8 +83,7 @@ app.layout = html.Div([
 )
 def render_tab_content(tab):
     if tab == 'tab-1':
-        table_names = list(dynamodb.tables.all())
-        options = [{'label': t.name, 'value': t.name} for t in table_names]
+        options = table_catalog.options()
 
         return html.Div([
             html.Div([
@@ -105,22 +111,9 @@ def render_tab_content(tab):
         return html.Div([
             html.Div([
                 html.H3("📤 上傳 CSV 檔案到 DynamoDB", style={'textAlign': 'center'}),
-                dcc.Upload(
-                    id='upload-data',
-                    children=html.Div([
-                        html.Button('選擇 CSV 檔案', style={
-                            'backgroundColor': '#28a745',
-                            'color': 'white',
-                            'padding': '10px 20px',
-                            'border': 'none',
-                            'borderRadius': '8px',
-                            'cursor': 'pointer'
-                        })
-                    ]),
-                    multiple=False,
-                    style={'textAlign': 'center', 'marginBottom': '20px'}
-                ),
+                upload_input('upload-data', textAlign='center', marginBottom='20px'),
                 html.Div(id='output-data-table'),
+                dcc.Store(id='upload-id'),  # 伺服器端暫存檔的 upload ID
                 html.Div([
                     html.Button('📤 上傳至 DynamoDB', id='upload-button',
                                 style={'display': 'none', 'backgroundColor': '#007bff', 'color': 'white',
@@ -139,6 +132,22 @@ def render_tab_content(tab):
         ])
 
 
+#表格目錄載入完成時，更新歡迎頁的表格列表
+@app.callback(
+    Output('table-dropdown', 'options'),
+    Output('catalog-interval', 'disabled'),
+    Input('tabs', 'value'),
+    Input('catalog-interval', 'n_intervals')
+)
+def update_table_options(tab, n_intervals):
+    loaded = table_catalog.loaded
+    if ctx.triggered_id == 'catalog-interval' and not loaded:
+        return dash.no_update, False
+    if tab == 'tab-1':
+        return table_catalog.options(), loaded
+    return dash.no_update, loaded  # 其他分頁時不更新
+
+
 #查看已經存在的TABLE資訊
 @app.callback(
     Output('table-info', 'children'),
@@ -149,17 +158,20 @@ def show_table_content(table_name):
         return ""
 
     try:
-        table = dynamodb.Table(table_name)
-        table.load()  # 讀取最新的 table metadata
+        # 讀取 table metadata (經過共用快取)
+        description = describe_table(dynamodb_client, table_name)
 
         # 取得基本結構
-        key_schema = table.key_schema
-        attr_defs = table.attribute_definitions
-        gsi = table.global_secondary_indexes or []
+        key_schema = description['KeySchema']
+        attr_defs = description['AttributeDefinitions']
+        gsi = description.get('GlobalSecondaryIndexes', [])
 
-        # 取得資料內容
-        response = table.scan()
-        items = response.get('Items', [])
+        # 取得資料內容 (平行掃描並跟隨分頁，結果存在共用快取中)
+        df = result_cache.get_or_load(
+            (table_name, 'scan'),
+            lambda: items_to_frame(scan_table(dynamodb_client, table_name))
+        )
+        has_items = not df.empty
 
         # 建立欄位資訊文字
         def get_key_type(attr_name):
@@ -186,8 +198,7 @@ def show_table_content(table_name):
 
         # 資料內容表格
         item_table = None
-        if items:
-            df = pd.DataFrame(items)
+        if has_items:
             item_table = dash_table.DataTable(
                 columns=[{'name': col, 'id': col} for col in df.columns],
                 data=df.to_dict('records'),
@@ -205,10 +216,11 @@ def show_table_content(table_name):
                 html.H5("📦 表格內容", style={'marginTop': '30px'}),
                 item_table,
                 html.Br(),
-                dcc.Download(id="download-csv"),
-                html.Button("📥 下載表格 CSV", id="download-button", n_clicks=0,
+                # 下載由 Flask 路由逐頁串流產生 CSV
+                html.A(html.Button("📥 下載表格 CSV", id="download-button", n_clicks=0,
                             style={'marginTop': '20px', 'backgroundColor': '#007bff', 'color': 'white', 'border': 'none',
-                                'padding': '10px 20px', 'borderRadius': '8px', 'cursor': 'pointer'}) if items else None
+                                'padding': '10px 20px', 'borderRadius': '8px', 'cursor': 'pointer'}),
+                       href=f"/export/{table_name}.csv") if has_items else None
             ], style={
                 'backgroundColor': '#fff',
                 'padding': '30px',
@@ -223,16 +235,16 @@ def show_table_content(table_name):
 
 #上傳TABLE
 @app.callback(
-    [Output('output-data-table', 'children'), Output('upload-button', 'style')],
-    [Input('upload-data', 'contents')]
+    [Output('output-data-table', 'children'), Output('upload-button', 'style'), Output('upload-id', 'data')],
+    [Input('upload-data', 'data')]
 )
-def show_dataframe(contents):
-    if contents is None:
-        return "", {'display': 'none'}
+def show_dataframe(upload):
+    if not upload:
+        return "", {'display': 'none'}, None
     
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
-    df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+    # 檔案已經分段上傳到伺服器端暫存檔，只讀取前幾筆作為預覽
+    upload_id = upload['upload_id']
+    df = pd.read_csv(upload_store.path(upload_id), nrows=50)
     
     table = dash_table.DataTable(
         columns=[{'name': col, 'id': col} for col in df.columns],
@@ -240,62 +252,55 @@ def show_dataframe(contents):
         page_size=10
     )
     
-    return table, {'display': 'block'}
+    return table, {'display': 'block'}, upload_id
 
 @app.callback(
     Output('upload-status', 'children'),
     Input('upload-button', 'n_clicks'),
-    State('upload-data', 'contents'),
-    State('upload-data', 'filename')
+    State('upload-id', 'data')
 )
-def upload_to_dynamodb(n_clicks, contents, filename):
-    if n_clicks is None or contents is None:
+def upload_to_dynamodb(n_clicks, upload_id):
+    if n_clicks is None or upload_id is None:
         return ""
     
     try:
-        content_type, content_string = contents.split(',')
-        decoded = base64.b64decode(content_string)
-        df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
-        column_names = df.columns.tolist()
-        
+        filename = upload_store.metadata(upload_id)['filename']
+        path = upload_store.path(upload_id)
+
+        # 建立表格前先掃描整個 CSV，每個欄位的型別只決定一次 (數字為 N，布林為 BOOL，其他為 S)；
+        # 前兩個欄位是鍵值，只能是 S 或 N，且每一列都必須有值
+        profile = profile_csv(path)
+        column_types = infer_types(path, schema=profile['schema'])
+        for key in list(column_types)[:2]:
+            if profile['missing'][key]:
+                return f"上傳失敗: 鍵值欄位 '{key}' 有 {profile['missing'][key]} 筆空值"
+            if column_types[key] != 'N':
+                column_types[key] = 'S'
+
+        # 逐區塊解析 CSV 並整欄轉成 DynamoDB 格式，空值的屬性不寫入
+        def iter_items():
+            return iter_csv_items(path, types=column_types, schema=profile['schema'])
+
+        # 依抽樣的項目大小計算上傳期間需要的容量
+        plan = plan_capacity(profile['rows'], measure_items(iter_items()))
+
         table_name = filename.split('.')[0]  # 取 CSV 檔案名稱作為表格名稱
-        table = create_table(dynamodb, table_name, column_names)
+        table = create_table(dynamodb, table_name, column_types, plan)
         table.wait_until_exists()
+        table_catalog.add(table_name)
         
-        for i in range(len(df)):
-            row = df.iloc[i]
-            item = {}
-            
-            for col in column_names:
-                if col == column_names[1]:
-                    item[col] = int(row[col])
-                else:
-                    item[col] = str(row[col])
-            table.put_item(Item=item)
+        # 以多執行緒 BatchWriteItem 寫入，完成後把 WCU 降回平時的容量
+        with provisioned_for_load(dynamodb_client, table_name, plan):
+            stats = batch_write(dynamodb_client, table_name, iter_items())
+
+        # 清除這張表格的查詢快取
+        result_cache.invalidate(table_name)
+        upload_store.discard(upload_id)
         
-        return f"資料已成功上傳到 DynamoDB (表格名稱: {table_name})！"
+        return (f"資料已成功上傳到 DynamoDB (表格名稱: {table_name})！"
+                f"({stats['rows']} 筆，{stats['rows_per_second']:.0f} 筆/秒)")
     except Exception as e:
         return f"上傳失敗: {str(e)}"
 
-@app.callback(
-    Output("download-csv", "data"),
-    Input("download-button", "n_clicks"),
-    State("table-dropdown", "value"),
-    prevent_initial_call=True
-)
-def download_table_as_csv(n_clicks, table_name):
-    if not table_name:
-        return dash.no_update
-
-    table = dynamodb.Table(table_name)
-    response = table.scan()
-    items = response.get('Items', [])
-    
-    if not items:
-        return dash.no_update
-
-    df = pd.DataFrame(items)
-    return dcc.send_data_frame(df.to_csv, filename=f"{table_name}.csv", index=False)
-
 if __name__ == '__main__':
     app.run_server(debug=True)
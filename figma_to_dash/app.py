@@ -1,33 +1,34 @@
 import dash
-from dash import html, dcc, Input, Output, State, callback, dash_table
+from dash import html, dcc, Input, Output, State, callback, dash_table, ctx
 import dash_bootstrap_components as dbc
-import boto3
 import pandas as pd
-import json
-from decimal import Decimal
-import base64
-import io
+import os
+import sys
+
+# 讓子資料夾中的程式也能匯入專案根目錄的 operations 模組
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from operations.convert import items_to_frame, frame_to_items
+from operations.catalog import TableCatalog
+from operations.dynamodb_ops import LazyConnection, scan_table, batch_write
+from operations.staging import upload_store
+from operations.uploads import UPLOAD_SCRIPT, upload_input, register_upload_routes
 
 # 初始化 Dash 應用程式，加入 suppress_callback_exceptions=True
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], external_scripts=[UPLOAD_SCRIPT],
+                suppress_callback_exceptions=True)
 app.title = "DynamoDB 工具"
 
-# AWS DynamoDB 客戶端
-dynamodb = boto3.resource('dynamodb')
-dynamodb_client = boto3.client('dynamodb')
+# AWS DynamoDB 客戶端 (共用的連線池與重試設定，operations.dynamodb_ops)
+# 第一次使用時才建立，匯入程式時不讀取憑證也不連線
+dynamodb = LazyConnection('resource')
+dynamodb_client = LazyConnection()
 
-# 處理 Decimal 類型
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# 分段上傳路由 (檔案直接寫入伺服器端暫存區)
+register_upload_routes(app.server)
 
-# **在應用啟動時載入表格列表**
-try:
-    table_options = [{"label": table, "value": table} for table in dynamodb_client.list_tables()['TableNames']]
-except Exception as e:
-    table_options = []
+# **表格目錄：在背景定期載入完整的表格列表**
+table_catalog = TableCatalog(dynamodb_client).start()
 
 app.layout = html.Div([
     dbc.Container([  # 這部分就是所有內容區域
@@ -39,7 +40,8 @@ app.layout = html.Div([
             dcc.Tab(label="上傳表格", value="tab-upload")
         ]),
 
-        html.Div(id="tabs-content")
+        html.Div(id="tabs-content"),
+        dcc.Interval(id="catalog-interval", interval=1000)  # 表格目錄載入完成前定期更新表格列表
     ], fluid=True),  # 這裡已經不需要再設定 className 了
 ], className="background-container")  # 保留 background-container 並設置背景圖片
 
@@ -58,7 +60,7 @@ def render_tab_content(tab):
                         dbc.Col(
                             dbc.Select(
                                 id="table-select",
-                                options=table_options,  # **直接載入表格列表**
+                                options=table_catalog.options(),  # **從表格目錄載入列表**
                                 placeholder="選擇表格",
                                 className="mb-2"
                             ),
@@ -102,11 +104,7 @@ def render_tab_content(tab):
             dbc.Card([  
                 dbc.CardBody([  
                     html.H4("上傳 CSV 檔案", className="card-title"),
-                    dcc.Upload(
-                        id="upload-data",
-                        children=html.Button('點擊此處選擇檔案'),
-                        multiple=False
-                    ),
+                    upload_input("upload-data"),  # 分段上傳 (operations.uploads)
                     html.Div(id="output-data-upload"),
                 ])
             ], className="mb-4"),
@@ -156,16 +154,14 @@ def view_table_content(n_clicks, table_name):
         return "請選擇表格", [], []
     
     try:
-        table = dynamodb.Table(table_name)
-        response = table.scan()
-        items = response.get('Items', [])
+        # 讀取速度限制在表格 RCU 的一定比例內 (DYNAMODB_READ_PERCENT)
+        items = scan_table(dynamodb_client, table_name)
         
         if not items:
             return f"表格 '{table_name}' 內容 (空表格)", [], []
         
         # 將數據轉換為DataFrame格式
-        json_items = json.loads(json.dumps(items, cls=DecimalEncoder))
-        df = pd.DataFrame(json_items)
+        df = items_to_frame(items)
         
         columns = [{"name": col, "id": col} for col in df.columns]
         data = df.to_dict('records')
@@ -181,19 +177,18 @@ def view_table_content(n_clicks, table_name):
     Output("uploaded-table-data", "columns"),
     Output("uploaded-table-data", "data"),
     Output("upload-to-dynamodb-btn", "style"),  # 顯示/隱藏按鈕
-    Input("upload-data", "contents"),
-    State("upload-data", "filename"),
+    Input("upload-data", "data"),
     prevent_initial_call=True
 )
-def upload_file(contents, filename):
-    if contents is None:
+def upload_file(upload):
+    if not upload:
         return "請上傳 CSV 檔案", [], [], {'display': 'none'}  # 隱藏按鈕
 
-    content_type, content_string = contents.split(',')
-    decoded = base64.b64decode(content_string)
+    filename = upload['filename']
     try:
-        # 嘗試讀取 CSV 檔案
-        df = pd.read_csv(io.StringIO(decoded.decode('utf-8')))
+        # 讀取已經分段上傳到伺服器端暫存區的 CSV 檔案
+        df = pd.read_csv(upload_store.path(upload['upload_id']), encoding='utf-8')
+        upload_store.discard(upload['upload_id'])
         columns = [{"name": col, "id": col} for col in df.columns]
         data = df.to_dict('records')
 
@@ -210,20 +205,19 @@ def upload_file(contents, filename):
     Input("upload-to-dynamodb-btn", "n_clicks"),
     State("uploaded-table-data", "data"),
     State("uploaded-table-data", "columns"),
-    State("upload-data", "filename"),
+    State("upload-data", "data"),
     prevent_initial_call=True
 )
-def upload_to_dynamodb(n_clicks, data, columns, filename):
+def upload_to_dynamodb(n_clicks, data, columns, upload):
     if not data:
         return "沒有資料可以上傳"
     
     try:
         # 1. **表格名稱來自 CSV 檔案名稱**
-        table_name = filename.split('.')[0]  # 去除副檔名，取得表格名稱
+        table_name = upload['filename'].split('.')[0]  # 去除副檔名，取得表格名稱
         
         # 2. **檢查表格是否已存在**
-        existing_tables = dynamodb_client.list_tables()['TableNames']
-        if table_name in existing_tables:
+        if table_catalog.exists(table_name):
             return "表格已存在，請選擇其他名稱"
         
         # 3. **確保每筆資料都有唯一的 `ID` 作為 Partition Key**
@@ -252,29 +246,31 @@ def upload_to_dynamodb(n_clicks, data, columns, filename):
 
         # 6. **等待表格創建完成**
         table.meta.client.get_waiter('table_exists').wait(TableName=table_name)
+        table_catalog.add(table_name)
 
-        # 7. **上傳資料到 DynamoDB**
-        for item in data:
-            table.put_item(Item={k: Decimal(v) if isinstance(v, (int, float)) else v for k, v in item.items()})
+        # 7. **上傳資料到 DynamoDB (多執行緒 BatchWriteItem)**
+        stats = batch_write(dynamodb_client, table_name, frame_to_items(pd.DataFrame(data)))
 
-        return f"資料已成功上傳到 DynamoDB 表格 '{table_name}'！"
+        return (f"資料已成功上傳到 DynamoDB 表格 '{table_name}'！"
+                f"({stats['rows']} 筆，{stats['rows_per_second']:.0f} 筆/秒)")
     
     except Exception as e:
         return f"上傳失敗: {str(e)}"
     
-# **當切換到查詢表格時，更新可選的表格列表**
+# **當切換到查詢表格或表格目錄載入完成時，更新可選的表格列表**
 @callback(
     Output("table-select", "options"),
-    Input("tabs", "value")
+    Output("catalog-interval", "disabled"),
+    Input("tabs", "value"),
+    Input("catalog-interval", "n_intervals")
 )
-def update_table_options(tab):
+def update_table_options(tab, n_intervals):
+    loaded = table_catalog.loaded
+    if ctx.triggered_id == "catalog-interval" and not loaded:
+        return dash.no_update, False
     if tab == "tab-query":
-        try:
-            table_names = dynamodb_client.list_tables()['TableNames']
-            return [{"label": table, "value": table} for table in table_names]
-        except Exception as e:
-            return []
-    return dash.no_update  # 其他分頁時不更新
+        return table_catalog.options(), loaded
+    return dash.no_update, loaded  # 其他分頁時不更新
 
 
 if __name__ == '__main__':
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+
+from operations.async_ops import scan_table_async
+from operations.cache import result_cache
+from operations.convert import items_to_frame
+
+
+# 生長紀錄的欄位：品種、調查週數，以及 updated_rice_growth 中合併的「品種_編號」欄位
+VARIETY_COLUMN = "variety"
+WEEK_COLUMN = "record_time"
+VARIETY_NUMBER_COLUMN = "variety_number"
+
+
+# scipy 為選用套件，只用來計算 p-value；匯入約需 1 秒，第一次計算時才匯入 (沒有安裝時 p-value 顯示為空白)
+def _scipy_stats():
+    try:
+        from scipy import stats
+    except ImportError:
+        return None
+    return stats
+
+
+# F 分佈的右尾機率
+def _f_pvalue(f_value, df_num, df_den):
+    stats = _scipy_stats()
+    if stats is None or not np.isfinite(f_value) or df_num <= 0 or df_den <= 0:
+        return np.nan
+    return float(stats.f.sf(f_value, df_num, df_den))
+
+
+# **讀取整張表格作為分析資料** (使用本地鏡像，或以 async client 限速的平行掃描，operations.async_ops)
+# 有 variety_number 欄位時拆成 variety 與 number，並把數字欄位轉成數值
+async def load_growth_frame_async(client, table_name, mirror=None):
+    if mirror is not None and mirror.enabled(table_name):
+        df = mirror.frame(table_name).copy()
+    else:
+        df = items_to_frame(await scan_table_async(client, table_name))
+
+    if VARIETY_NUMBER_COLUMN in df.columns and VARIETY_COLUMN not in df.columns:
+        parts = df[VARIETY_NUMBER_COLUMN].astype(str).str.split('_', n=1, expand=True)
+        df[VARIETY_COLUMN] = parts[0]
+        df['number'] = pd.to_numeric(parts[1], errors='coerce') if parts.shape[1] > 1 else np.nan
+        df = df.drop(columns=[VARIETY_NUMBER_COLUMN])
+    return df
+
+
+# 可以分析的數值欄位 (不含週數與編號)
+def measure_columns(df):
+    return [col for col in df.columns
+            if pd.api.types.is_numeric_dtype(df[col].dtype) and col not in (WEEK_COLUMN, 'number', 'ID')]
+
+
+# **每個 (品種, 週數) 的統計量**，整張表格只計算一次
+# 回傳 count / mean / var / 四分位數 / 鬚的上下界 (1.5 IQR 內的最小最大值)
+def cell_stats(df, value, factors=(VARIETY_COLUMN, WEEK_COLUMN)):
+    data = df[list(factors) + [value]].dropna()
+    grouped = data.groupby(list(factors), sort=True)[value]
+    result = grouped.agg(['count', 'mean', 'var', 'min', 'max'])
+    quantiles = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    result['q1'], result['median'], result['q3'] = quantiles[0.25], quantiles[0.5], quantiles[0.75]
+
+    # 鬚：在 [q1 - 1.5 IQR, q3 + 1.5 IQR] 範圍內的最小值與最大值 (與一般箱型圖相同)
+    iqr = result['q3'] - result['q1']
+    bounds = data.join((result['q1'] - 1.5 * iqr).rename('low'), on=list(factors))
+    bounds = bounds.join((result['q3'] + 1.5 * iqr).rename('high'), on=list(factors))
+    inside = bounds[(bounds[value] >= bounds['low']) & (bounds[value] <= bounds['high'])]
+    whiskers = inside.groupby(list(factors))[value].agg(['min', 'max'])
+    result['lowerfence'] = whiskers['min']
+    result['upperfence'] = whiskers['max']
+    result['var'] = result['var'].fillna(0.0)
+    return result.reset_index()
+
+
+# 加權最小平方法 (以每格的平均與筆數計算)，回傳殘差平方和
+def _weighted_rss(cells, columns, value_mean='mean', weight='count'):
+    design = [np.ones(len(cells))]
+    for col in columns:
+        dummies = pd.get_dummies(cells[col], drop_first=True, dtype=float)
+        design.extend(dummies.to_numpy().T)
+    x = np.column_stack(design)
+    w = np.sqrt(cells[weight].to_numpy(dtype=float))
+    y = cells[value_mean].to_numpy(dtype=float)
+    coef, *_ = np.linalg.lstsq(x * w[:, None], y * w, rcond=None)
+    lack_of_fit = float((cells[weight] * (y - x @ coef) ** 2).sum())
+    return lack_of_fit, np.linalg.matrix_rank(x)
+
+
+# **雙因子 ANOVA (Type II，含交互作用)**
+# 直接由每格的統計量 (cell_stats) 計算：格內平方和為殘差，各模型的殘差平方和以格平均的加權迴歸求得，
+# 與 statsmodels 的 anova_lm(ols('y ~ C(a) * C(b)'), typ=2) 結果相同，但不需要對每筆資料重新擬合
+def two_way_anova(cells, a=VARIETY_COLUMN, b=WEEK_COLUMN):
+    cells = cells[cells['count'] > 0]
+    n = int(cells['count'].sum())
+    within = float(((cells['count'] - 1) * cells['var']).sum())
+
+    rss_a, rank_a = _weighted_rss(cells, [a])
+    rss_b, rank_b = _weighted_rss(cells, [b])
+    rss_ab, rank_ab = _weighted_rss(cells, [a, b])
+
+    df_resid = n - len(cells)
+    rows = {
+        f"C({a})": (rss_b - rss_ab, rank_ab - rank_b),
+        f"C({b})": (rss_a - rss_ab, rank_ab - rank_a),
+        f"C({a}):C({b})": (rss_ab, len(cells) - rank_ab),
+    }
+    table = []
+    for name, (sum_sq, df) in rows.items():
+        f_value = (sum_sq / df) / (within / df_resid) if df > 0 and df_resid > 0 and within > 0 else np.nan
+        table.append({'source': name, 'sum_sq': sum_sq, 'df': df, 'F': f_value,
+                      'PR(>F)': _f_pvalue(f_value, df, df_resid)})
+    table.append({'source': 'Residual', 'sum_sq': within, 'df': df_resid, 'F': np.nan, 'PR(>F)': np.nan})
+    return pd.DataFrame(table)
+
+
+# **Levene 檢定 (以中位數為中心，與 scipy.stats.levene 預設相同)**
+# 整欄一次計算每筆資料與所屬組中位數的距離，回傳 (統計量, p-value)
+def levene(df, value, group=VARIETY_COLUMN):
+    data = df[[group, value]].dropna()
+    z = (data[value] - data.groupby(group)[value].transform('median')).abs()
+    z_group = z.groupby(data[group])
+    k = z_group.ngroups
+    n = len(z)
+    if k < 2 or n <= k:
+        return np.nan, np.nan
+    between = float((z_group.count() * (z_group.mean() - z.mean()) ** 2).sum())
+    within = float(((z - z_group.transform('mean')) ** 2).sum())
+    if within == 0:
+        return np.nan, np.nan
+    statistic = (n - k) / (k - 1) * between / within
+    return statistic, _f_pvalue(statistic, k - 1, n - k)
+
+
+# **依表格版本記住計算結果**
+# version 為本地鏡像的版本 (沒有鏡像時為 0)；上傳或修改資料後 result_cache.invalidate 會一併清除
+def memoized(table_name, version, name, loader):
+    return result_cache.get_or_load((table_name, 'analytics', version) + tuple(name), loader)
+
+
+# async 版本 (loader 為 coroutine function)
+async def memoized_async(table_name, version, name, loader):
+    key = (table_name, 'analytics', version) + tuple(name)
+    value = result_cache.get(key)
+    if value is None:
+        value = await loader()
+        result_cache.put(key, value)
+    return value
@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import time
+from contextlib import asynccontextmanager
+
+from dash import callback
+
+from operations.dynamodb_ops import DEFAULT_REGION, config_options, get_client
+from operations.ratelimit import limiter_for, limited_async
+from operations.scan import DEFAULT_TOTAL_SEGMENTS
+
+# **async 的範圍**
+# 這裡提供的是「一個回調之內」的並行：同一個回調中的多個請求 (例如平行掃描的各個分段) 以 asyncio.gather 同時等待。
+# 回調本身仍然佔用處理這個請求的 WSGI (Flask) 執行緒直到完成，不論有沒有安裝 dash[async]：
+# 不會讓同一個 worker 同時處理更多請求，要那樣需要改用 ASGI 伺服器。
+# aiobotocore 為選用套件：有安裝時回調內的請求都在 event loop 上進行；
+# 沒有安裝時改用共用的同步 client (operations.dynamodb_ops)，每個請求佔用 asyncio.to_thread 執行緒池中的一個執行緒。
+# 使用 async 的只有讀取生長分析的表格、建立 / 刪除索引與建立表格；表格瀏覽、上傳與匯出仍是同步的
+try:
+    from aiobotocore.config import AioConfig
+    from aiobotocore.session import get_session as get_aio_session
+except ImportError:
+    get_aio_session = None
+
+# Dash 的 async 回調需要 dash[async] (asgiref)；沒有安裝時 async_callback 以 asyncio.run 執行
+# (兩種方式在 Flask 底下都是在請求的執行緒中跑完整個 event loop)
+try:
+    import asgiref  # noqa: F401
+    ASYNC_CALLBACKS = True
+except ImportError:
+    ASYNC_CALLBACKS = False
+
+
+# 沒有 aiobotocore 時的替代品：與 aiobotocore client 相同的呼叫方式 (await client.scan(...))
+class ThreadedClient:
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        async def call(**kwargs):
+            return await asyncio.to_thread(method, **kwargs)
+        return call
+
+
+# **async 的 DynamoDB client**
+# 每個 async with 區塊建立一個 client (aiobotocore client 綁定建立它的 event loop，
+# Flask 的 async 回調每個請求使用不同的 event loop)；同一個回調中的所有並行請求共用它的連線池
+@asynccontextmanager
+async def async_client(region_name=None):
+    if get_aio_session is None:
+        yield ThreadedClient(get_client(region_name))
+        return
+    session = get_aio_session()
+    async with session.create_client('dynamodb', region_name=region_name or DEFAULT_REGION,
+                                     config=AioConfig(**config_options())) as client:
+        yield client
+
+
+# **以 async 函式定義 Dash 回調**
+# 用法與 dash.callback 相同；有 dash[async] 時直接註冊 async 回調，否則包成同步函式，以 asyncio.run 執行。
+# 兩種情況下回調內的請求都可以並行，但回調完成前都佔用請求的執行緒
+def async_callback(*args, **kwargs):
+    def decorator(func):
+        if ASYNC_CALLBACKS:
+            return callback(*args, **kwargs)(func)
+
+        @functools.wraps(func)
+        def run(*func_args, **func_kwargs):
+            return asyncio.run(func(*func_args, **func_kwargs))
+        return callback(*args, **kwargs)(run)
+    return decorator
+
+
+# 讀取速度限制在表格 RCU 的 capacity_percent% 以內 (與同步的掃描共用同一個限速器)
+async def _limiter(client, table_name, kind, capacity_percent):
+    description = (await client.describe_table(TableName=table_name))['Table']
+    return limiter_for(description, kind, capacity_percent)
+
+
+# 依照 LastEvaluatedKey 逐頁呼叫 request (async generator)
+async def iter_pages_async(request, **kwargs):
+    while True:
+        response = await request(**kwargs)
+        yield response
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+async def _read_all(request, **kwargs):
+    items = []
+    async for page in iter_pages_async(request, **kwargs):
+        items.extend(page.get('Items', []))
+    return items
+
+
+# **平行掃描整張表格**：total_segments 個分段同時在 event loop 上等待，依分段順序合併結果
+async def scan_table_async(client, table_name, total_segments=None, capacity_percent=None, **kwargs):
+    total_segments = total_segments or DEFAULT_TOTAL_SEGMENTS
+    scan = limited_async(client.scan, await _limiter(client, table_name, 'read', capacity_percent))
+    segments = await asyncio.gather(*[
+        _read_all(scan, TableName=table_name, Segment=segment, TotalSegments=total_segments, **kwargs)
+        for segment in range(total_segments)
+    ])
+    return [item for segment in segments for item in segment]
+
+
+# **等待表格變成 ACTIVE** (indexes=True 時也等待所有 GSI 回填完成)
+# 回傳最後一次 DescribeTable 的結果
+async def wait_for_table_async(client, table_name, indexes=False, delay=2, timeout=600):
+    deadline = time.monotonic() + timeout
+    while True:
+        description = (await client.describe_table(TableName=table_name))['Table']
+        pending = [i for i in description.get('GlobalSecondaryIndexes', []) if i.get('IndexStatus') != 'ACTIVE']
+        if description['TableStatus'] == 'ACTIVE' and not (indexes and pending):
+            return description
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"表格 '{table_name}' 在 {timeout} 秒內沒有變成 ACTIVE")
+        await asyncio.sleep(delay)
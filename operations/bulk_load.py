@@ -0,0 +1,101 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+from operations.ratelimit import limited
+
+# BatchWriteItem 一次最多 25 筆
+MAX_BATCH_SIZE = 25
+
+# 同時送出批次寫入的執行緒數量，可用環境變數調整
+DEFAULT_MAX_WORKERS = int(os.environ.get("DYNAMODB_WRITE_WORKERS", "8"))
+
+# UnprocessedItems 重試次數與退避時間 (秒)
+MAX_RETRIES = 10
+BASE_DELAY = 0.05
+MAX_DELAY = 5.0
+
+# 每次取出 size 筆資料
+def _chunks(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# **同一批次中鍵值重複的資料只保留最後一筆**
+# BatchWriteItem 的同一個請求中不能有重複的鍵值 (ValidationException)，逐筆 put_item 時則是後寫入的覆蓋先寫入的
+def unique_by_key(items, key_names):
+    unique = {}
+    for item in items:
+        unique[tuple(tuple(item.get(name, {}).items()) for name in key_names)] = item
+    return list(unique.values())
+
+
+# **寫入一個批次 (最多 25 筆)**
+# DynamoDB 在節流時會把沒寫入的資料放在 UnprocessedItems 回傳，
+# 這裡以加上隨機抖動的指數退避 (full jitter) 重試，直到全部寫入為止
+# request 為 dynamodb_client.batch_write_item (或經過限速器包裝的版本)；
+# 傳入 key_names (表格的鍵值屬性) 時先去除鍵值重複的資料，回傳的筆數仍包含被覆蓋的資料
+def write_batch(request, table_name, items, key_names=None):
+    unique = unique_by_key(items, key_names) if key_names else items
+    requests = [{'PutRequest': {'Item': item}} for item in unique]
+    attempt = 0
+    while requests:
+        response = request(RequestItems={table_name: requests})
+        requests = response.get('UnprocessedItems', {}).get(table_name, [])
+        if requests:
+            attempt += 1
+            if attempt > MAX_RETRIES:
+                raise RuntimeError(f"表格 '{table_name}' 有 {len(requests)} 筆資料重試 {MAX_RETRIES} 次後仍無法寫入")
+            time.sleep(random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt)))
+    return len(items)
+
+
+# **多執行緒批次寫入**
+# items 為 client 格式的資料 (可以是 generator，例如 operations.ingest.iter_csv_items)，切成 25 筆一批交給執行緒池寫入；
+# 同時在途的批次數量有上限，資料不會一次全部留在記憶體中。
+# on_progress(rows_written, elapsed_seconds) 會在每個批次完成後呼叫；
+# 傳入 limiter (operations.ratelimit) 時依 ConsumedCapacity 限制寫入速度；
+# 傳入 key_names 時每個批次中鍵值重複的資料只寫入最後一筆 (unique_by_key)；
+# should_stop() 回傳 True 時不再送出新的批次，等在途的批次完成後正常返回 (呼叫端的 finally 仍會執行)
+# 回傳 {'rows', 'seconds', 'rows_per_second', 'cancelled'}
+def bulk_write(dynamodb_client, table_name, items, max_workers=None, on_progress=None, limiter=None, key_names=None,
+               should_stop=None):
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    request = limited(dynamodb_client.batch_write_item, limiter)
+    started = time.monotonic()
+    written = 0
+    pending = set()
+    cancelled = False
+
+    def collect(done):
+        nonlocal written
+        for future in done:
+            written += future.result()
+        if on_progress:
+            on_progress(written, time.monotonic() - started)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for chunk in _chunks(items, MAX_BATCH_SIZE):
+            if should_stop and should_stop():
+                cancelled = True
+                break
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(pool.submit(write_batch, request, table_name, chunk, key_names))
+        if pending:
+            collect(wait(pending).done)
+
+    seconds = time.monotonic() - started
+    return {
+        'rows': written,
+        'seconds': seconds,
+        'rows_per_second': written / seconds if seconds > 0 else float(written),
+        'cancelled': cancelled
+    }
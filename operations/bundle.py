@@ -0,0 +1,140 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from operations.dynamodb_ops import scan_frame
+from operations.mirror import pyarrow_available, arrow_table
+
+# 同時匯出的表格數量，以及記錄匯出進度的資料夾，可用環境變數調整
+DEFAULT_MAX_WORKERS = int(os.environ.get("DYNAMODB_EXPORT_WORKERS", "4"))
+DEFAULT_PROGRESS_DIR = os.environ.get("DYNAMODB_EXPORT_PROGRESS_DIR",
+                                      os.path.join(tempfile.gettempdir(), "dash_exports"))
+
+# 可以選擇的格式 (parquet 需要 pyarrow)
+FORMATS = ('parquet', 'csv.gz')
+
+
+# **匯出進度**
+# 每個匯出工作一個 JSON 檔 ({表格: {'status', 'rows'}})，讓其他 worker 行程的回調也能讀取
+class ExportProgress:
+    def __init__(self, directory=DEFAULT_PROGRESS_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, job_id):
+        # job ID 由 uuid4().hex 產生，只接受十六進位字元，避免路徑穿越
+        if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            raise KeyError(job_id)
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def new_job(self):
+        return uuid.uuid4().hex
+
+    def get(self, job_id):
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def update(self, job_id, table_name, **state):
+        with self._lock:
+            progress = self.get(job_id)
+            progress[table_name] = dict(progress.get(table_name, {}), **state, updated=time.time())
+            temp_path = self._path(job_id) + f".{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(progress, f, ensure_ascii=False)
+            os.replace(temp_path, self._path(job_id))
+
+
+export_progress = ExportProgress()
+
+
+# 把寫入 zip 的內容暫存起來，讓 generator 可以一段一段送出 (zipfile 在無法 seek 的輸出上會使用 data descriptor)
+class _StreamBuffer(io.RawIOBase):
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+# DataFrame 轉成檔案內容 (Parquet 以 zstd 壓縮；沒有 pyarrow 時改用 gzip 壓縮的 CSV)
+def encode_frame(df, fmt):
+    if fmt == 'parquet' and pyarrow_available():
+        import pyarrow.parquet as pq
+        buffer = io.BytesIO()
+        pq.write_table(arrow_table(df), buffer, compression='zstd')
+        return 'parquet', buffer.getvalue()
+    return 'csv.gz', gzip.compress(df.to_csv(index=False).encode('utf-8-sig'))
+
+
+# **讀取一張表格並轉成檔案內容**
+# 使用本地鏡像 (有啟用時) 或限速的平行掃描；每讀到一頁就更新進度
+def export_table(dynamodb_client, table_name, fmt, job_id=None, mirror=None, progress=export_progress):
+    def report(**state):
+        if job_id:
+            progress.update(job_id, table_name, **state)
+
+    rows = 0
+    rows_lock = threading.Lock()
+
+    def on_page(response):
+        nonlocal rows
+        with rows_lock:
+            rows += len(response.get('Items', []))
+            report(status='scanning', rows=rows)
+
+    report(status='scanning', rows=0)
+    df = scan_frame(dynamodb_client, table_name, mirror, on_page)
+
+    report(status='encoding', rows=len(df))
+    extension, content = encode_frame(df, fmt)
+    report(status='done', rows=len(df), bytes=len(content))
+    return f"{table_name}.{extension}", content
+
+
+# **同時匯出多張表格，串流產生一個 zip 檔**
+# 最多 max_workers 張表格同時掃描，哪張先完成就先寫入 zip 送出；
+# 檔案本身已經壓縮，zip 中不再壓縮 (ZIP_STORED)。失敗的表格以 <表格>.error.txt 記錄原因
+def iter_bundle(dynamodb_client, table_names, fmt='parquet', job_id=None, mirror=None, max_workers=None):
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    buffer = _StreamBuffer()
+    for table_name in table_names:
+        if job_id:
+            export_progress.update(job_id, table_name, status='waiting', rows=0)
+
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_STORED) as bundle:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(export_table, dynamodb_client, table_name, fmt, job_id, mirror): table_name
+                for table_name in table_names
+            }
+            for future in as_completed(futures):
+                table_name = futures[future]
+                try:
+                    filename, content = future.result()
+                except Exception as e:
+                    if job_id:
+                        export_progress.update(job_id, table_name, status='failed', error=str(e))
+                    filename, content = f"{table_name}.error.txt", str(e).encode('utf-8')
+                bundle.writestr(filename, content)
+                yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# 快取存活時間 (秒) 與記憶體上限 (MB)，可用環境變數調整
+DEFAULT_TTL = float(os.environ.get("DYNAMODB_CACHE_TTL", "300"))
+DEFAULT_MAX_MB = float(os.environ.get("DYNAMODB_CACHE_MAX_MB", "256"))
+
+
+# 粗略估計快取內容佔用的記憶體大小 (bytes)
+def estimate_size(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+# **整個程式共用的查詢結果快取**
+# key 的第一個元素必須是表格名稱，例如 (table_name, query_shape, ...)，
+# 以便寫入資料後可以清除該表格所有的快取。超過 TTL 的項目視為失效，
+# 超過記憶體上限時淘汰最久沒用到的項目 (LRU)
+class ResultCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value, ttl=None):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return value  # 單一結果就超過上限時不快取
+
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return value
+
+    # 取得快取，沒有時呼叫 loader 讀取並存入快取
+    def get_or_load(self, key, loader, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, loader(), ttl)
+        return value
+
+    # 清除某張表格所有的快取 (上傳或修改資料後呼叫)
+    def invalidate(self, table_name):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == table_name]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+result_cache = ResultCache()
+
+
+# 讀取表格的 DescribeTable 結果 (經過快取)
+def describe_table(dynamodb_client, table_name):
+    return result_cache.get_or_load(
+        (table_name, 'describe'),
+        lambda: dynamodb_client.describe_table(TableName=table_name)['Table']
+    )
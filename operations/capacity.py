@@ -0,0 +1,146 @@
+import math
+import os
+from contextlib import contextmanager
+from itertools import islice
+
+# 希望一次上傳在幾秒內完成，用來計算需要的 WCU
+DEFAULT_TARGET_SECONDS = float(os.environ.get("DYNAMODB_LOAD_TARGET_SECONDS", "300"))
+
+# 計費模式：auto (依負載自動選擇)、PROVISIONED 或 PAY_PER_REQUEST
+DEFAULT_BILLING_MODE = os.environ.get("DYNAMODB_BILLING_MODE", "auto")
+
+# 上傳完成後表格平時使用的容量
+STEADY_READ_CAPACITY = int(os.environ.get("DYNAMODB_STEADY_RCU", "5"))
+STEADY_WRITE_CAPACITY = int(os.environ.get("DYNAMODB_STEADY_WCU", "5"))
+
+# auto 模式下，需要的 WCU 超過此值時改用 PAY_PER_REQUEST (短時間的大量寫入)
+ON_DEMAND_THRESHOLD = int(os.environ.get("DYNAMODB_ON_DEMAND_THRESHOLD", "1000"))
+
+# 單一表格可以設定的 WCU 上限 (AWS 預設配額)
+MAX_WRITE_CAPACITY = 40000
+
+# 估計項目大小時抽樣的筆數
+SAMPLE_ROWS = 1000
+
+
+# 計算單一屬性值在 DynamoDB 中佔用的大小 (bytes)，規則參考 DynamoDB 的項目大小計算方式
+def _value_size(value):
+    tag, raw = next(iter(value.items()))
+    if tag == 'S':
+        return len(raw.encode('utf-8'))
+    if tag == 'N':
+        digits = raw.lstrip('-').replace('.', '').lstrip('0') or '0'
+        return (len(digits) + 1) // 2 + 1
+    if tag == 'B':
+        return len(raw)
+    if tag in ('BOOL', 'NULL'):
+        return 1
+    if tag == 'L':
+        return 3 + sum(1 + _value_size(v) for v in raw)
+    if tag == 'M':
+        return 3 + sum(1 + len(k.encode('utf-8')) + _value_size(v) for k, v in raw.items())
+    if tag == 'SS':
+        return sum(len(v.encode('utf-8')) for v in raw)
+    if tag == 'NS':
+        return sum(_value_size({'N': v}) for v in raw)
+    return sum(len(v) for v in raw)
+
+
+# client 格式項目的大小 (屬性名稱 + 屬性值)
+def item_size(item):
+    return sum(len(name.encode('utf-8')) + _value_size(value) for name, value in item.items())
+
+
+# 寫入一筆項目需要的 WCU (每 1 KB 為 1 WCU，無條件進位)
+def write_units(size):
+    return max(1, math.ceil(size / 1024))
+
+
+# **從暫存資料抽樣計算項目大小**
+# items 為 client 格式的項目 (例如 iter_csv_items(path))，只讀取前 sample_rows 筆
+def measure_items(items, sample_rows=SAMPLE_ROWS):
+    sizes = [item_size(item) for item in islice(items, sample_rows)]
+    if not sizes:
+        return {'avg_size': 0, 'max_size': 0, 'wcu_per_item': 1}
+    return {
+        'avg_size': sum(sizes) / len(sizes),
+        'max_size': max(sizes),
+        'wcu_per_item': sum(write_units(s) for s in sizes) / len(sizes)
+    }
+
+
+# **計算上傳需要的容量**
+# 回傳 billing_mode 與上傳期間 (load) / 上傳後 (steady) 的容量
+def plan_capacity(row_count, sizes, target_seconds=DEFAULT_TARGET_SECONDS, billing_mode=DEFAULT_BILLING_MODE):
+    load_wcu = math.ceil(row_count * sizes['wcu_per_item'] / max(target_seconds, 1))
+    load_wcu = min(max(load_wcu, STEADY_WRITE_CAPACITY), MAX_WRITE_CAPACITY)
+
+    if billing_mode == 'auto':
+        billing_mode = 'PAY_PER_REQUEST' if load_wcu > ON_DEMAND_THRESHOLD else 'PROVISIONED'
+
+    return {
+        'billing_mode': billing_mode,
+        'load_wcu': load_wcu,
+        'steady_rcu': STEADY_READ_CAPACITY,
+        'steady_wcu': STEADY_WRITE_CAPACITY,
+        'avg_size': sizes['avg_size']
+    }
+
+
+# create_table 使用的計費參數 (建立時直接使用上傳期間的容量)
+def table_billing_args(plan):
+    if plan['billing_mode'] == 'PAY_PER_REQUEST':
+        return {'BillingMode': 'PAY_PER_REQUEST'}
+    return {
+        'BillingMode': 'PROVISIONED',
+        'ProvisionedThroughput': {
+            'ReadCapacityUnits': plan['steady_rcu'],
+            'WriteCapacityUnits': plan['load_wcu']
+        }
+    }
+
+
+# 更新表格 (與所有 GSI) 的容量並等待表格回到 ACTIVE
+def set_provisioned_capacity(dynamodb_client, table_name, read_capacity, write_capacity):
+    description = dynamodb_client.describe_table(TableName=table_name)['Table']
+    if description.get('BillingModeSummary', {}).get('BillingMode') == 'PAY_PER_REQUEST':
+        return False
+
+    throughput = {'ReadCapacityUnits': read_capacity, 'WriteCapacityUnits': write_capacity}
+    current = description['ProvisionedThroughput']
+    index_updates = [
+        {'Update': {'IndexName': index['IndexName'], 'ProvisionedThroughput': throughput}}
+        for index in description.get('GlobalSecondaryIndexes', [])
+        if index['ProvisionedThroughput']['WriteCapacityUnits'] != write_capacity
+        or index['ProvisionedThroughput']['ReadCapacityUnits'] != read_capacity
+    ]
+    kwargs = {}
+    if (current['ReadCapacityUnits'], current['WriteCapacityUnits']) != (read_capacity, write_capacity):
+        kwargs['ProvisionedThroughput'] = throughput
+    if index_updates:
+        kwargs['GlobalSecondaryIndexUpdates'] = index_updates
+    if not kwargs:
+        return False
+
+    dynamodb_client.update_table(TableName=table_name, **kwargs)
+    dynamodb_client.get_waiter('table_exists').wait(TableName=table_name)
+    return True
+
+
+# **上傳期間提高容量，結束後 (即使失敗) 降回平時的容量**
+# PAY_PER_REQUEST 的表格不需要調整
+@contextmanager
+def provisioned_for_load(dynamodb_client, table_name, plan):
+    if plan['billing_mode'] == 'PAY_PER_REQUEST':
+        yield
+        return
+
+    set_provisioned_capacity(dynamodb_client, table_name, plan['steady_rcu'], plan['load_wcu'])
+    try:
+        yield
+    finally:
+        try:
+            set_provisioned_capacity(dynamodb_client, table_name, plan['steady_rcu'], plan['steady_wcu'])
+        except Exception as e:
+            # DynamoDB 每天降低容量的次數有限，降不下來時不影響上傳結果
+            print(f"降低表格 '{table_name}' 容量失敗: {str(e)}")
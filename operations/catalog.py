@@ -0,0 +1,95 @@
+import os
+import threading
+
+# 背景重新整理表格列表的間隔 (秒)
+DEFAULT_REFRESH_INTERVAL = float(os.environ.get("DYNAMODB_CATALOG_REFRESH", "60"))
+
+
+# 跟隨 LastEvaluatedTableName 取得帳號中所有的表格名稱 (每次最多回傳 100 個)
+def list_all_tables(dynamodb_client):
+    names = []
+    kwargs = {}
+    while True:
+        response = dynamodb_client.list_tables(**kwargs)
+        names.extend(response.get('TableNames', []))
+        last_name = response.get('LastEvaluatedTableName')
+        if not last_name:
+            return names
+        kwargs['ExclusiveStartTableName'] = last_name
+
+
+# **表格目錄**
+# 在背景定期重新整理表格列表，下拉選單與存在檢查都直接讀記憶體中的列表；
+# 程式自己建立表格後用 add() 在本地更新，不必等下一次重新整理
+class TableCatalog:
+    def __init__(self, dynamodb_client, refresh_interval=DEFAULT_REFRESH_INTERVAL):
+        self.dynamodb_client = dynamodb_client
+        self.refresh_interval = refresh_interval
+        self._names = set()
+        self._loaded = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.error = None  # 最近一次背景重新整理失敗的原因
+
+    def refresh(self):
+        names = list_all_tables(self.dynamodb_client)
+        with self._lock:
+            self._names = set(names)
+        self.error = None
+        self._loaded.set()
+        return names
+
+    # 啟動背景執行緒 (重複呼叫不會建立第二個執行緒)
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="table-catalog", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.error = str(e)
+                print(f"重新整理表格列表失敗: {str(e)}")
+            self._stop.wait(self.refresh_interval)
+
+    @property
+    def loaded(self):
+        return self._loaded.is_set()
+
+    # 就緒檢查 (operations.warmup) 使用的狀態
+    def status(self):
+        with self._lock:
+            count = len(self._names)
+        return {'ready': self.loaded, 'tables': count, 'error': self.error}
+
+    # 目前已知的表格名稱；還沒載入過時同步讀取一次 (wait=False 時不等待，直接回傳目前已知的名稱)
+    def names(self, wait=True):
+        if not self.loaded and wait:
+            try:
+                self.refresh()
+            except Exception:
+                return []
+        with self._lock:
+            return sorted(self._names)
+
+    # 下拉選單的選項不等待載入 (畫面不會因為 list_tables 卡住)，載入完成後由回調更新
+    def options(self):
+        return [{"label": table, "value": table} for table in self.names(wait=False)]
+
+    def exists(self, table_name):
+        return table_name in self.names()
+
+    def add(self, table_name):
+        with self._lock:
+            self._names.add(table_name)
+
+    def remove(self, table_name):
+        with self._lock:
+            self._names.discard(table_name)
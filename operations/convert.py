@@ -0,0 +1,142 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+# boto3 的 TypeDeserializer 第一次轉換混合型別的欄位時才建立 (匯入 boto3 會拖慢啟動)
+_deserializer = None
+
+
+def _deserialize(value):
+    global _deserializer
+    if _deserializer is None:
+        from boto3.dynamodb.types import TypeDeserializer
+        _deserializer = TypeDeserializer()
+    return _deserializer.deserialize(value)
+
+
+# 將 Decimal / set 等轉成可以直接放進 DataFrame 與 JSON 的型別 (整數保持為 int)
+def _plain(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, set, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+# 將一個欄位的原始數字字串整欄轉成 int64 / float64
+# 有空值 (沒有這個屬性的項目) 但所有的值都是整數時使用可含空值的 Int64，整數不會顯示成 1.0
+# (超出 int64 範圍的整數改用 float64)
+def _number_column(raws, has_null):
+    series = pd.Series(raws, dtype=object)
+    numbers = pd.to_numeric(series, errors='coerce')
+    if not series.dropna().str.contains(r'[.eE]').any() and numbers.abs().max() < 2 ** 63:
+        return numbers.astype('Int64' if has_null else 'int64')
+    return numbers.astype('float64')
+
+
+# 轉換單一欄位：先看整欄的型別標記，單一純量型別時整欄一次轉換，
+# 其他情況 (L / M / SS / 混合型別) 才逐值反序列化
+def _convert_column(values):
+    tags = []
+    raws = []
+    for value in values:
+        if value is None:
+            tags.append(None)
+            raws.append(None)
+        else:
+            tag, raw = next(iter(value.items()))
+            tags.append(tag)
+            raws.append(raw)
+
+    kinds = set(tags)
+    has_null = None in kinds or 'NULL' in kinds
+    kinds.discard(None)
+    kinds.discard('NULL')
+
+    if kinds == {'N'}:
+        return _number_column([None if t == 'NULL' else r for t, r in zip(tags, raws)], has_null)
+    if kinds == {'S'}:
+        return pd.Series([None if t == 'NULL' else r for t, r in zip(tags, raws)], dtype=object)
+    if kinds == {'BOOL'} and not has_null:
+        return pd.Series(raws, dtype=bool)
+
+    return pd.Series(
+        [None if value is None else _plain(_deserialize(value)) for value in values],
+        dtype=object
+    )
+
+
+# **將 dynamodb_client 回傳的 Items (wire format) 直接轉成 DataFrame**
+# 數字欄位會成為 int64 / Int64 (全部為整數時，Int64 可含空值) 或 float64，不再經過 json.dumps / json.loads
+def items_to_frame(items, columns=None):
+    if not items:
+        return pd.DataFrame(columns=columns or [])
+
+    if columns is None:
+        # 依屬性第一次出現的順序決定欄位順序
+        seen = {}
+        for item in items:
+            for name in item:
+                seen.setdefault(name, None)
+        columns = list(seen)
+
+    return pd.DataFrame({
+        name: _convert_column([item.get(name) for item in items])
+        for name in columns
+    }, columns=columns)
+
+
+# **由 DataFrame 的 dtype 決定每個欄位的 DynamoDB 型別 (只判斷一次)**
+# dtypes 為 df.dtypes 或 {欄位: dtype}；整數 / 浮點數為 N，布林為 BOOL，其他一律為 S
+def column_types(dtypes):
+    types = {}
+    for col, dtype in dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            types[col] = 'BOOL'
+        elif pd.api.types.is_numeric_dtype(dtype):
+            types[col] = 'N'
+        else:
+            types[col] = 'S'
+    return types
+
+
+# 把一個欄位 (已去除空值) 整欄轉成 wire format 的原始值
+# 浮點數以最短的十進位表示轉成字串 (0.1 -> "0.1")，不會帶出二進位誤差；
+# 整數值的浮點數 (例如含空值的整數欄位) 存成 "3" 而不是 "3.0"
+def _wire_values(series, tag):
+    if tag == 'BOOL':
+        return series.astype(bool).tolist()
+    if tag == 'N':
+        if pd.api.types.is_integer_dtype(series.dtype):
+            return series.astype('int64').astype(str).tolist()
+        values = series.to_numpy(dtype='float64')
+        if np.isinf(values).any():
+            raise ValueError(f"欄位 '{series.name}' 含有無限大的值，無法存成 DynamoDB 的數字")
+        integral = (values == np.round(values)) & (np.abs(values) < 2 ** 53)
+        whole = np.where(integral, values, 0).astype('int64')
+        return np.where(integral, whole.astype(str), values.astype(str)).tolist()
+    return series.astype(str).tolist()
+
+
+# **將 DataFrame 整欄轉成 client 使用的 wire format 項目**
+# types 為 {欄位: 'S' / 'N' / 'BOOL'} (預設由 column_types 依 dtype 決定)；
+# 空值 (None / NaN / NA) 的屬性直接省略，不會存成 "nan" 字串
+def frame_to_items(df, types=None):
+    types = types or column_types(df.dtypes)
+    names = list(types)
+    columns = []
+    for name in names:
+        series = df[name]
+        mask = series.notna().to_numpy()
+        column = np.full(len(df), None, dtype=object)
+        tag = types[name]
+        column[mask] = [{tag: value} for value in _wire_values(series[mask], tag)]
+        columns.append(column)
+
+    return [
+        {name: value for name, value in zip(names, row) if value is not None}
+        for row in zip(*columns)
+    ]
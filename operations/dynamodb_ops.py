@@ -1,203 +1,133 @@
-import dash
-from dash import html, dcc, Input, Output, State, callback
-import dash_bootstrap_components as dbc
-import boto3
-import json
-from decimal import Decimal
-
-# 初始化 Dash 應用程式
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
-app.title = "DynamoDB 工具"
-
-# AWS DynamoDB 客戶端
-dynamodb = boto3.resource('dynamodb')
-dynamodb_client = boto3.client('dynamodb')
-
-# 處理 Decimal 類型
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
-
-# 取得 DynamoDB 表格列表
-try:
-    table_options = [{"label": table, "value": table} for table in dynamodb_client.list_tables()['TableNames']]
-except Exception:
-    table_options = []
-
-# 應用程式介面
-app.layout = html.Div([
-    dbc.Container([
-        html.H1("DynamoDB 工具", className="my-4"),
-
-        # 分頁
-        dcc.Tabs(id="tabs", value="tab-query", children=[
-            dcc.Tab(label="查詢表格", value="tab-query"),
-            dcc.Tab(label="創建表格", value="tab-create"),
-        ]),
-
-        html.Div(id="tabs-content")
-    ])
-])
-
-# **查詢表格內容回調**
-@callback(
-    Output("table-header", "children"),
-    Output("table-data", "columns"),
-    Output("table-data", "data"),
-    Input("view-table-btn", "n_clicks"),
-    State("table-select", "value"),
-    prevent_initial_call=True
-)
-def view_table_content(n_clicks, table_name):
-    if not table_name:
-        return "請選擇表格", [], []
-    
-    try:
-        table = dynamodb.Table(table_name)
-        response = table.scan()
-        items = response.get('Items', [])
-        
-        if not items:
-            return f"表格 '{table_name}' 內容 (空表格)", [], []
-        
-        # 將數據轉換為DataFrame格式
-        json_items = json.loads(json.dumps(items, cls=DecimalEncoder))
-        df = pd.DataFrame(json_items)
-        
-        columns = [{"name": col, "id": col} for col in df.columns]
-        data = df.to_dict('records')
-        
-        return f"表格 '{table_name}' 內容 ({len(data)} 筆資料)", columns, data
-    
-    except Exception as e:
-        return f"查詢表格 '{table_name}' 失敗: {str(e)}", [], []
-
-
-# **分頁內容回調**
-@callback(
-    Output("tabs-content", "children"),
-    Input("tabs", "value")
-)
-def render_tab_content(tab):
-    if tab == "tab-query":
-        return html.Div([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4("選擇表格", className="card-title"),
-                    dbc.Select(id="table-select", options=table_options, placeholder="選擇表格"),
-                    dbc.Button("查看表格內容", id="view-table-btn", color="success", className="mt-2"),
-                    html.Div(id="table-content")
-                ])
-            ])
-        ])
-
-    elif tab == "tab-create":
-        return html.Div([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4("創建新表格", className="card-title"),
-
-                    # 表格名稱輸入
-                    dbc.Input(id="new-table-name", placeholder="輸入表格名稱", type="text", className="mb-2"),
-
-                    # Attribute 名稱 & 類型
-                    html.Div(id="attribute-container", children=[
-                        dbc.Row([
-                            dbc.Col(dbc.Input(placeholder="Attribute Name", type="text"), width=5),
-                            dbc.Col(dbc.Select(
-                                options=[
-                                    {"label": "String", "value": "S"},
-                                    {"label": "Number", "value": "N"},
-                                    {"label": "Binary", "value": "B"}
-                                ],
-                                placeholder="選擇類型"
-                            ), width=4),
-                            dbc.Col(dbc.Button("❌", color="danger", className="remove-attr-btn"), width=1)
-                        ], className="mb-2")
-                    ]),
-
-                    # 按鈕
-                    dbc.Button("新增屬性", id="add-attribute-btn", color="secondary", className="mb-2"),
-                    dbc.Button("創建表格", id="create-table-btn", color="primary", className="mb-2"),
-
-                    # 創建結果
-                    html.Div(id="create-table-status", className="mt-2")
-                ])
-            ])
-        ])
-
-# **允許新增多個 Attribute**
-@callback(
-    Output("attribute-container", "children"),
-    Input("add-attribute-btn", "n_clicks"),
-    State("attribute-container", "children"),
-    prevent_initial_call=True
-)
-def add_attribute_field(n_clicks, existing_children):
-    new_input = dbc.Row([
-        dbc.Col(dbc.Input(placeholder="Attribute Name", type="text"), width=5),
-        dbc.Col(dbc.Select(
-            options=[
-                {"label": "String", "value": "S"},
-                {"label": "Number", "value": "N"},
-                {"label": "Binary", "value": "B"}
-            ],
-            placeholder="選擇類型"
-        ), width=4),
-        dbc.Col(dbc.Button("❌", color="danger", className="remove-attr-btn"), width=1)
-    ], className="mb-2")
-
-    existing_children.append(new_input)
-    return existing_children
-
-# **創建表格回調**
-@callback(
-    Output("create-table-status", "children"),
-    Input("create-table-btn", "n_clicks"),
-    State("new-table-name", "value"),
-    State("attribute-container", "children"),
-    prevent_initial_call=True
-)
-def create_table(n_clicks, table_name, attributes):
-    if not table_name:
-        return "⚠️ 請輸入表格名稱！"
-
-    if not attributes or len(attributes) == 0:
-        return "⚠️ 至少需要一個 Attribute！"
-
-    try:
-        attribute_definitions = []
-        key_schema = []
-        
-        for attr in attributes:
-            attr_name = attr["props"]["children"][0]["props"]["children"]["props"]["value"]
-            attr_type = attr["props"]["children"][1]["props"]["children"]["props"]["value"]
-
-            if not attr_name or not attr_type:
-                return "⚠️ 所有屬性名稱和類型都必須填寫！"
-
-            attribute_definitions.append({"AttributeName": attr_name, "AttributeType": attr_type})
-
-            # 第一個欄位為 Partition Key，第二個為 Sort Key（如果有的話）
-            if len(key_schema) == 0:
-                key_schema.append({"AttributeName": attr_name, "KeyType": "HASH"})
-            elif len(key_schema) == 1:
-                key_schema.append({"AttributeName": attr_name, "KeyType": "RANGE"})
-
-        # 創建表格
-        dynamodb.create_table(
-            TableName=table_name,
-            KeySchema=key_schema,
-            AttributeDefinitions=attribute_definitions,
-            ProvisionedThroughput={"ReadCapacityUnits": 5, "WriteCapacityUnits": 5}
-        )
-        return f"✅ 表格 '{table_name}' 創建成功！"
-
-    except Exception as e:
-        return f"❌ 創建表格失敗: {str(e)}"
-
-# 啟動應用程式
-if __name__ == '__main__':
-    app.run_server(debug=True)
+import os
+import threading
+
+from operations.bulk_load import bulk_write
+from operations.convert import items_to_frame
+from operations.ratelimit import get_limiter, limiter_for, limited
+from operations.scan import parallel_scan, iter_pages
+
+# **共用的 DynamoDB 連線設定**，可用環境變數調整
+# 連線池要容納同時進行的平行掃描 (DYNAMODB_SCAN_WORKERS)、批次寫入 (DYNAMODB_WRITE_WORKERS)
+# 與多表格匯出 (DYNAMODB_EXPORT_WORKERS × 掃描執行緒)，botocore 預設只有 10 條連線
+MAX_POOL_CONNECTIONS = int(os.environ.get("DYNAMODB_MAX_POOL_CONNECTIONS", "64"))
+
+# adaptive 重試會在節流時同時降低用戶端的送出速度；max_attempts 為重試次數 (不含第一次請求)
+RETRY_MODE = os.environ.get("DYNAMODB_RETRY_MODE", "adaptive")
+MAX_ATTEMPTS = int(os.environ.get("DYNAMODB_MAX_ATTEMPTS", "10"))
+
+# 連線與讀取逾時 (秒)
+CONNECT_TIMEOUT = float(os.environ.get("DYNAMODB_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("DYNAMODB_READ_TIMEOUT", "30"))
+
+# 預設區域 (沒有設定時由 AWS_DEFAULT_REGION / ~/.aws/config 決定)
+DEFAULT_REGION = os.environ.get("DYNAMODB_REGION") or None
+
+
+# 連線設定 (同步的 botocore Config 與 async 的 AioConfig 共用)
+def config_options():
+    return {
+        'max_pool_connections': MAX_POOL_CONNECTIONS,
+        'retries': {'mode': RETRY_MODE, 'max_attempts': MAX_ATTEMPTS},
+        'tcp_keepalive': True,
+        'connect_timeout': CONNECT_TIMEOUT,
+        'read_timeout': READ_TIMEOUT,
+    }
+
+
+# boto3 / botocore 在第一次建立連線時才匯入
+def client_config():
+    from botocore.config import Config
+    return Config(**config_options())
+
+
+# **每個區域一個 session，client 與 resource 各建立一次後共用**
+# 讀寫資料一律使用 client (client 格式的項目，operations.convert 直接轉換)；
+# resource.meta.client 會把項目轉成 Python 型別，只用在建立表格等管理操作。
+# boto3 建立 session / client 不是執行緒安全的，以鎖保護，建立後可以在多個執行緒中共用
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _get(region_name, kind):
+    import boto3
+    region_name = region_name or DEFAULT_REGION
+    with _sessions_lock:
+        entry = _sessions.setdefault(region_name, {'session': boto3.session.Session(region_name=region_name)})
+        if kind not in entry:
+            session = entry['session']
+            if kind == 'streams':
+                entry[kind] = session.client('dynamodbstreams', config=client_config())
+            else:
+                create = session.client if kind == 'client' else session.resource
+                entry[kind] = create('dynamodb', config=client_config())
+        return entry[kind]
+
+
+def get_client(region_name=None):
+    return _get(region_name, 'client')
+
+
+def get_resource(region_name=None):
+    return _get(region_name, 'resource')
+
+
+# **第一次使用時才建立的 client / resource** (kind 為 'client'、'resource' 或 'streams' (DynamoDB Streams 的 client))
+# 匯入程式時不讀取憑證也不連線 (憑證或網路有問題時不會卡住啟動)；
+# 屬性存取都轉給 get_client() / get_resource() 共用的物件
+class LazyConnection:
+    def __init__(self, kind='client', region_name=None):
+        self._kind = kind
+        self._region_name = region_name
+
+    def __getattr__(self, name):
+        return getattr(_get(self._region_name, self._kind), name)
+
+
+# **依序讀取每一頁** (request 為 'scan' 或 'query')，讀取速度限制在表格 RCU 的 capacity_percent% 以內
+# 每次產生一頁的項目 (client 格式)
+def read_pages(dynamodb_client, table_name, request='scan', capacity_percent=None, **kwargs):
+    limiter = get_limiter(dynamodb_client, table_name, 'read', capacity_percent)
+    read = limited(getattr(dynamodb_client, request), limiter)
+    for response in iter_pages(read, TableName=table_name, **kwargs):
+        yield response.get('Items', [])
+
+
+# 讀取 Query 的所有結果
+def query_items(dynamodb_client, table_name, capacity_percent=None, **kwargs):
+    items = []
+    for page in read_pages(dynamodb_client, table_name, 'query', capacity_percent, **kwargs):
+        items.extend(page)
+    return items
+
+
+# **限速的平行掃描整張表格** (operations.scan.parallel_scan)
+# on_page(response) 會在每讀到一頁時呼叫 (可以從多個執行緒同時呼叫)，例如回報進度
+def scan_table(dynamodb_client, table_name, capacity_percent=None, on_page=None, **kwargs):
+    scan = limited(dynamodb_client.scan, get_limiter(dynamodb_client, table_name, 'read', capacity_percent))
+    if on_page is not None:
+        request = scan
+
+        def scan(**params):
+            response = request(**params)
+            on_page(response)
+            return response
+
+    return parallel_scan(scan, TableName=table_name, **kwargs)
+
+
+# **整張表格的 DataFrame**：使用本地鏡像 (operations.mirror，有啟用時) 或限速的平行掃描
+def scan_frame(dynamodb_client, table_name, mirror=None, on_page=None):
+    if mirror is not None and mirror.enabled(table_name):
+        return mirror.frame(table_name)
+    return items_to_frame(scan_table(dynamodb_client, table_name, on_page=on_page))
+
+
+# **限速的多執行緒批次寫入** (operations.bulk_load.bulk_write)，寫入速度限制在表格 WCU 的 capacity_percent% 以內
+# 同一批次中鍵值重複的資料只寫入最後一筆 (與逐筆 put_item 相同，後寫入的覆蓋先寫入的)；
+# should_stop 見 bulk_write (取消上傳)
+def batch_write(dynamodb_client, table_name, items, on_progress=None, capacity_percent=None, should_stop=None):
+    description = dynamodb_client.describe_table(TableName=table_name)['Table']
+    limiter = limiter_for(description, 'write', capacity_percent)
+    key_names = [key['AttributeName'] for key in description['KeySchema']]
+    return bulk_write(dynamodb_client, table_name, items, on_progress=on_progress, limiter=limiter,
+                      key_names=key_names, should_stop=should_stop)
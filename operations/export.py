@@ -0,0 +1,138 @@
+import pickle
+import tempfile
+from urllib.parse import urlencode
+
+from flask import Response, request, stream_with_context
+
+from operations.paging import iter_table_pages
+from operations.bundle import iter_bundle, FORMATS
+from operations.cache import describe_table
+from operations.convert import items_to_frame
+from operations.query import build_read, filter_types
+from operations.ratelimit import get_limiter, limited
+
+
+# **逐頁產生 CSV 內容**
+# 選擇了欄位 (params['columns']) 時，每讀到一頁就轉成 CSV 片段送出；
+# 沒有選擇時欄位要等讀完才知道 (上傳時空值的屬性不寫入，後面的頁面可能出現新的屬性)，
+# 先把每一頁存到暫存檔，讀完後以所有出現過的屬性作為標題列再轉換送出。記憶體中同時只保留一頁資料
+# 讀取速度限制在表格 RCU 的 capacity_percent% 以內，避免影響其他使用者
+# params 與查看表格時相同 (operations.query.build_read)，有分割鍵時匯出 Query 的結果
+def iter_csv(dynamodb_client, table_name, page_size=None, capacity_percent=None, params=None):
+    yield '\ufeff'  # utf-8-sig 的 BOM，讓 Excel 正確顯示中文
+
+    description = describe_table(dynamodb_client, table_name)
+    read, kwargs = build_read(dynamodb_client, description, params,
+                              filter_types(dynamodb_client, description, params, page_size))
+    limiter = get_limiter(dynamodb_client, table_name, 'read', capacity_percent)
+    pages = iter_table_pages(limited(read, limiter), table_name, page_size, **kwargs)
+
+    columns = list((params or {}).get('columns') or [])
+    if columns:
+        yield items_to_frame([], columns).to_csv(index=False)
+        for items in pages:
+            if items:
+                yield items_to_frame(items, columns).to_csv(index=False, header=False)
+        return
+
+    seen = {}
+    with tempfile.TemporaryFile() as spool:
+        page_count = 0
+        for items in pages:
+            if not items:
+                continue
+            for item in items:
+                for name in item:
+                    seen.setdefault(name, None)
+            pickle.dump(items, spool, pickle.HIGHEST_PROTOCOL)
+            page_count += 1
+
+        columns = list(seen)
+        if not columns:
+            return
+        yield items_to_frame([], columns).to_csv(index=False)
+        spool.seek(0)
+        for _ in range(page_count):
+            yield items_to_frame(pickle.load(spool), columns).to_csv(index=False, header=False)
+
+
+# 從本地鏡像匯出 (operations.mirror)：篩選 / 排序在本地執行，每次轉換 rows 筆
+def iter_mirror_csv(mirror, table_name, params=None, rows=10000):
+    yield '\ufeff'
+    df = mirror.read(table_name, params)
+    yield df.iloc[:0].to_csv(index=False)
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows].to_csv(index=False, header=False)
+
+
+# 查看表格時的讀取參數轉成下載連結的 query string
+def export_query_string(page_size, params=None):
+    args = {'page_size': page_size}
+    for name, value in (params or {}).items():
+        if name == 'sort_by':
+            # DataTable 的 sort_by 為 [{'column_id', 'direction'}]，只使用第一個
+            if value:
+                args['sort_column'] = value[0]['column_id']
+                args['sort_direction'] = value[0]['direction']
+        elif value not in (None, '', []):
+            args[name] = value
+    return urlencode(args, doseq=True)
+
+
+# 多張表格打包下載的 query string (job 為 operations.bundle.export_progress 的進度 ID)
+def bundle_query_string(table_names, fmt, job_id=None):
+    args = {'tables': list(table_names), 'format': fmt}
+    if job_id:
+        args['job'] = job_id
+    return urlencode(args, doseq=True)
+
+
+# **在 Dash 的 Flask 伺服器上註冊 CSV 下載路由**
+# 傳入 mirror (operations.mirror.TableMirror) 時，使用鏡像的表格從本地快照匯出
+# GET /export/<table_name>.csv?page_size=10&capacity_percent=50&index=...&partition_value=...&sort_op=...&sort_values=...&columns=...
+#     &filter_query=...&sort_column=...&sort_direction=asc|desc
+# GET /export/bundle.zip?tables=a&tables=b&format=parquet|csv.gz&job=<進度 ID>  (多張表格打包下載，operations.bundle)
+def register_export_route(server, dynamodb_client, mirror=None):
+    @server.route("/export/<table_name>.csv")
+    def export_table_csv(table_name):
+        page_size = request.args.get("page_size", type=int)
+        capacity_percent = request.args.get("capacity_percent", type=float)
+        params = {
+            'index': request.args.get("index"),
+            'partition_value': request.args.get("partition_value"),
+            'sort_op': request.args.get("sort_op"),
+            'sort_values': request.args.getlist("sort_values"),
+            'columns': request.args.getlist("columns"),
+            'filter_query': request.args.get("filter_query"),
+        }
+        if request.args.get("sort_column"):
+            params['sort_by'] = [{
+                'column_id': request.args["sort_column"],
+                'direction': request.args.get("sort_direction", "asc")
+            }]
+        if mirror is not None and mirror.enabled(table_name):
+            content = iter_mirror_csv(mirror, table_name, params)
+        else:
+            content = iter_csv(dynamodb_client, table_name, page_size, capacity_percent, params)
+        return Response(
+            stream_with_context(content),
+            mimetype="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={table_name}.csv"}
+        )
+
+    @server.route("/export/bundle.zip")
+    def export_bundle():
+        table_names = list(dict.fromkeys(request.args.getlist("tables")))
+        if not table_names:
+            return Response("請選擇要匯出的表格", status=400)
+        fmt = request.args.get("format", FORMATS[0])
+        if fmt not in FORMATS:
+            return Response(f"不支援的格式: {fmt}", status=400)
+        content = iter_bundle(dynamodb_client, table_names, fmt, request.args.get("job"), mirror)
+        return Response(
+            stream_with_context(content),
+            mimetype="application/zip",
+            headers={"Content-Disposition": "attachment; filename=tables.zip"}
+        )
+
+    return export_table_csv
@@ -0,0 +1,132 @@
+from operator import eq, ne, lt, le, gt, ge
+
+import pandas as pd
+
+# DataTable filter_query 的運算子 (依 Dash 文件的寫法，較長的運算子要先比對)
+FILTER_OPERATORS = [
+    ['ge ', '>='],
+    ['le ', '<='],
+    ['lt ', '<'],
+    ['gt ', '>'],
+    ['ne ', '!='],
+    ['eq ', '='],
+    ['contains '],
+    ['datestartswith '],
+]
+
+# 對應到 DynamoDB FilterExpression 的比較運算子
+COMPARATORS = {'eq': '=', 'ne': '<>', 'lt': '<', 'le': '<=', 'gt': '>', 'ge': '>='}
+
+# 對應到 pandas 的比較
+FRAME_COMPARATORS = {'eq': eq, 'ne': ne, 'lt': lt, 'le': le, 'gt': gt, 'ge': ge}
+
+
+# 解析單一條件，例如 {height} > 50 或 {variety} eq "Taoyuan3"
+# 回傳 (欄位, 運算子, 值的字串, 是否為加上引號的字串)
+def split_filter_part(filter_part):
+    for operator_type in FILTER_OPERATORS:
+        for operator in operator_type:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+                value_part = value_part.strip()
+                quote = value_part[:1]
+                if quote in ("'", '"', '`') and value_part[-1:] == quote and len(value_part) > 1:
+                    return name, operator_type[0].strip(), value_part[1:-1].replace('\\' + quote, quote), True
+                return name, operator_type[0].strip(), value_part, False
+    raise ValueError(f"無法解析的篩選條件: {filter_part}")
+
+
+# **解析 DataTable 的 filter_query**
+# 多個條件以 && 連接，回傳 [(欄位, 運算子, 值, 是否為字串), ...]
+def parse_filter_query(filter_query):
+    if not filter_query:
+        return []
+    return [split_filter_part(part) for part in filter_query.split(' && ') if part.strip()]
+
+
+# 屬性型別為 S 時一律為 S (例如 "007" 這類以字串儲存的數字)；
+# 屬性型別為 N，或型別不明且沒有引號的值是數字時視為 N，否則為 S
+def filter_value(value, quoted, attribute_type=None):
+    if attribute_type == 'S':
+        return {'S': value}
+    if not quoted or attribute_type == 'N':
+        try:
+            float(value)
+            return {'N': value}
+        except ValueError:
+            pass
+    return {'S': value}
+
+
+# **數字屬性的 contains 改為等於**
+# DataTable 沒有設定 type 的欄位預設以 contains 篩選，但 DynamoDB 的 contains 不能用在 N 屬性上 (永遠不符合)；
+# types 為 {屬性: 型別} (operations.query.attribute_types)
+def numeric_conditions(conditions, types):
+    return [(column, 'eq' if operator == 'contains' and types.get(column) == 'N' else operator, value, quoted)
+            for column, operator, value, quoted in conditions]
+
+
+# **把條件轉成 FilterExpression**
+# 名稱與值的代號使用 #f0 / :f0 ...，不會和鍵值條件與欄位選擇的代號衝突
+# types 為 {屬性: 型別}，N 屬性的值一律以數字比較 (contains 改為等於)，S 屬性的值一律以字串比較
+def filter_args(conditions, types=None):
+    types = types or {}
+    expressions = []
+    names = {}
+    values = {}
+    for i, (column, operator, value, quoted) in enumerate(numeric_conditions(conditions, types)):
+        name, placeholder = f"#f{i}", f":f{i}"
+        names[name] = column
+        values[placeholder] = filter_value(value, quoted, types.get(column))
+        if operator == 'contains':
+            # contains 只能用在字串 (或集合)，值一律視為字串
+            values[placeholder] = {'S': value}
+            expressions.append(f"contains({name}, {placeholder})")
+        elif operator == 'datestartswith':
+            values[placeholder] = {'S': value}
+            expressions.append(f"begins_with({name}, {placeholder})")
+        else:
+            expressions.append(f"{name} {COMPARATORS[operator]} {placeholder}")
+
+    return {
+        'FilterExpression': " AND ".join(expressions),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+    }
+
+
+# 數字欄位 (不含布林值)
+def is_number_column(series):
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+# 把值的字串轉成與欄位相同的型別再比較 (數字欄位用數字比較，其他用字串比較)
+def _frame_value(series, value):
+    if is_number_column(series):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+# **在 DataFrame 上套用同樣的篩選條件** (讀取本地鏡像時使用，整欄一次比較)
+# 與 filter_args 相同，數字欄位的 contains 改為等於
+def filter_frame(df, conditions):
+    mask = pd.Series(True, index=df.index)
+    for column, op, value, quoted in conditions:
+        if column not in df.columns:
+            return df.iloc[0:0]
+        series = df[column]
+        if op == 'contains' and is_number_column(series):
+            op = 'eq'
+        if op == 'contains':
+            mask &= series.astype(str).str.contains(value, regex=False) & series.notna()
+        elif op in ('datestartswith', 'begins_with'):
+            mask &= series.astype(str).str.startswith(value) & series.notna()
+        else:
+            target = _frame_value(series, value)
+            values = series if not isinstance(target, str) else series.astype(str)
+            mask &= FRAME_COMPARATORS[op](values, target) & series.notna()
+    return df[mask]
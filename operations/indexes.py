@@ -0,0 +1,261 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from operations.async_ops import wait_for_table_async
+from operations.filters import parse_filter_query, numeric_conditions
+from operations.query import key_schemas, apply_key_conditions
+
+# 記錄查詢方式的檔案 (重新啟動後仍保留)，可用環境變數調整
+DEFAULT_ACCESS_LOG = os.environ.get("DYNAMODB_ACCESS_LOG", os.path.join(tempfile.gettempdir(), "dash_access_log.json"))
+
+# 同一種查詢方式至少出現幾次才建議建立索引，以及一次最多建議幾個索引
+MIN_QUERIES = int(os.environ.get("DYNAMODB_ADVISOR_MIN_QUERIES", "3"))
+MAX_RECOMMENDATIONS = int(os.environ.get("DYNAMODB_ADVISOR_MAX_INDEXES", "5"))
+
+# DynamoDB 的限制：每張表格最多 20 個 GSI，INCLUDE 投影最多 20 個非鍵值屬性
+MAX_GLOBAL_INDEXES = 20
+MAX_PROJECTED_ATTRIBUTES = 20
+
+# 可以當作索引鍵的屬性型別
+KEY_TYPES = ('S', 'N', 'B')
+
+# 篩選條件中可以由排序鍵處理的運算子
+RANGE_OPERATORS = ('lt', 'le', 'gt', 'ge', 'datestartswith')
+
+
+# **從讀取參數整理出查詢方式**
+# partition 為等值條件的屬性 (可以當作分割鍵)，sort 為範圍條件或排序的屬性，
+# columns 為讀取的欄位 (空的代表全部)，index 為實際使用的索引 ('' 為表格本身，None 為 Scan)
+def access_pattern(params, description, types=None):
+    params = params or {}
+    conditions = numeric_conditions(parse_filter_query(params.get('filter_query')), types or {})
+    schemas = key_schemas(description)
+    routed, _ = apply_key_conditions(params, conditions, description)
+
+    partition = sort = index = None
+    if routed.get('partition_value') not in (None, ''):
+        index = routed.get('index') or ''
+        keys = schemas[index]
+        partition = keys['partition'][0]
+        if keys['sort'] and routed.get('sort_op'):
+            sort = keys['sort'][0]
+    else:
+        partition = next((c[0] for c in conditions if c[1] == 'eq'), None)
+
+    if sort is None:
+        sort = next((c[0] for c in conditions if c[1] in RANGE_OPERATORS and c[0] != partition), None)
+    if sort is None and params.get('sort_by'):
+        sort = params['sort_by'][0]['column_id']
+
+    return {
+        'partition': partition,
+        'sort': sort if sort != partition else None,
+        'columns': sorted(params.get('columns') or []),
+        'index': index,
+    }
+
+
+# **查詢方式紀錄**
+# 每張表格記錄各種查詢方式出現的次數與最後一次出現的時間，以及由索引建議建立的 GSI 與建立時間，
+# 存成 JSON 檔讓多個 worker 行程與重新啟動後都能使用
+class AccessLog:
+    def __init__(self, path=DEFAULT_ACCESS_LOG):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    # 一張表格的紀錄 {'patterns': {pattern: {'count', 'last'}}, 'indexes': {索引名稱: 建立時間}}
+    # (舊格式只有 {pattern: 次數}，視為很久以前記錄的)
+    @staticmethod
+    def _entry(data, table_name):
+        entry = data.setdefault(table_name, {})
+        if 'patterns' not in entry:
+            entry = data[table_name] = {
+                'patterns': {key: {'count': count, 'last': 0} for key, count in entry.items()},
+                'indexes': {}
+            }
+        return entry
+
+    # 記錄一次查詢 (沒有任何條件或排序的 Scan 不需要索引，不記錄)
+    def record(self, table_name, pattern):
+        if pattern['partition'] is None and pattern['sort'] is None and pattern['index'] is None:
+            return
+        key = json.dumps(pattern, sort_keys=True)
+        with self._lock:
+            data = self._load()
+            counts = self._entry(data, table_name)['patterns']
+            counts[key] = {'count': counts.get(key, {}).get('count', 0) + 1, 'last': time.time()}
+            self._save(data)
+
+    # 回傳 [(pattern, 次數), ...]；傳入 since 時只包含這個時間之後還出現過的查詢方式
+    def patterns(self, table_name, since=None):
+        with self._lock:
+            counts = self._entry(self._load(), table_name)['patterns']
+        return [(json.loads(key), value['count']) for key, value in counts.items()
+                if since is None or value['last'] >= since]
+
+    # 由索引建議建立的 GSI {名稱: 建立時間}；只有這些索引會被建議刪除
+    def indexes(self, table_name):
+        with self._lock:
+            return dict(self._entry(self._load(), table_name)['indexes'])
+
+    def record_index(self, table_name, name, dropped=False):
+        with self._lock:
+            data = self._load()
+            indexes = self._entry(data, table_name)['indexes']
+            if dropped:
+                indexes.pop(name, None)
+            else:
+                indexes[name] = time.time()
+            self._save(data)
+
+    def clear(self, table_name):
+        with self._lock:
+            data = self._load()
+            if data.pop(table_name, None) is not None:
+                self._save(data)
+
+
+access_log = AccessLog()
+
+
+# 索引名稱 (與原本每個欄位一個 GSI 時的命名方式一致)
+def index_name(partition, sort=None):
+    return f"{partition}_{sort}_Index" if sort else f"{partition}_Index"
+
+
+# **依查詢紀錄建議要建立的 GSI**
+# 同一個分割鍵只建議一個索引，排序鍵取最常一起使用的範圍 / 排序屬性；
+# 已經是表格或現有 GSI 分割鍵的屬性不再建議。
+# 投影：有查詢讀取全部欄位時為 ALL，否則只包含讀取過的欄位 (INCLUDE / KEYS_ONLY)
+# types 為屬性型別 (operations.query.attribute_types)，只有 S / N / B 的屬性可以當作鍵值
+def recommend_indexes(description, patterns, types, min_count=MIN_QUERIES, max_indexes=MAX_RECOMMENDATIONS):
+    # 包含建立中的 GSI，避免重複建議
+    served = {k['AttributeName'] for index in [description] + description.get('GlobalSecondaryIndexes', [])
+              for k in index['KeySchema'] if k['KeyType'] == 'HASH'}
+    types = dict(types, **{a['AttributeName']: a['AttributeType'] for a in description['AttributeDefinitions']})
+    table_keys = [k['AttributeName'] for k in description['KeySchema']]
+
+    groups = {}
+    for pattern, count in patterns:
+        partition = pattern['partition']
+        if partition is None or partition in served or types.get(partition) not in KEY_TYPES:
+            continue
+        group = groups.setdefault(partition, {'count': 0, 'sorts': Counter(), 'columns': set(), 'all_columns': False})
+        group['count'] += count
+        if pattern['sort'] and types.get(pattern['sort']) in KEY_TYPES:
+            group['sorts'][pattern['sort']] += count
+        if pattern['columns']:
+            group['columns'].update(pattern['columns'])
+        else:
+            group['all_columns'] = True
+
+    available = MAX_GLOBAL_INDEXES - len(description.get('GlobalSecondaryIndexes', []))
+    recommendations = []
+    for partition, group in sorted(groups.items(), key=lambda g: -g[1]['count']):
+        if group['count'] < min_count or len(recommendations) >= min(max_indexes, available):
+            continue
+        sort = group['sorts'].most_common(1)[0][0] if group['sorts'] else None
+        keys = set(table_keys) | {partition, sort}
+        non_key = sorted(group['columns'] - keys)
+        if group['all_columns'] or len(non_key) > MAX_PROJECTED_ATTRIBUTES:
+            projection = {'ProjectionType': 'ALL'}
+        elif non_key:
+            projection = {'ProjectionType': 'INCLUDE', 'NonKeyAttributes': non_key}
+        else:
+            projection = {'ProjectionType': 'KEYS_ONLY'}
+        recommendations.append({
+            'IndexName': index_name(partition, sort),
+            'partition': (partition, types[partition]),
+            'sort': (sort, types[sort]) if sort else None,
+            'Projection': projection,
+            'count': group['count'],
+        })
+    return recommendations
+
+
+# **找出沒有被任何查詢使用的 GSI**
+# 只考慮由索引建議建立 (log.indexes) 且已經 ACTIVE 的 GSI，其他應用程式使用的索引不會被建議刪除；
+# 只看索引建立之後還出現過的查詢方式：實際使用了這個索引，或以它的分割鍵做等值查詢 (包含回填完成前的 Scan)
+# 都算使用過。建立後的查詢紀錄不足 min_count 次時不建議刪除
+def unused_indexes(description, table_name, log=None, min_count=MIN_QUERIES):
+    log = log or access_log
+    created = log.indexes(table_name)
+    unused = []
+    for index in description.get('GlobalSecondaryIndexes', []):
+        name = index['IndexName']
+        if name not in created or index.get('IndexStatus', 'ACTIVE') != 'ACTIVE':
+            continue
+        patterns = log.patterns(table_name, since=created[name])
+        if sum(count for _, count in patterns) < min_count:
+            continue
+        partition = next(k['AttributeName'] for k in index['KeySchema'] if k['KeyType'] == 'HASH')
+        if not any(pattern['index'] == name or pattern['partition'] == partition for pattern, _ in patterns):
+            unused.append(name)
+    return unused
+
+
+# 建立 GSI 的 UpdateTable 參數 (PROVISIONED 的表格沿用表格目前的容量)
+def create_index_args(description, recommendation):
+    partition_name, partition_type = recommendation['partition']
+    key_schema = [{'AttributeName': partition_name, 'KeyType': 'HASH'}]
+    types = {partition_name: partition_type}
+    if recommendation['sort']:
+        sort_name, sort_type = recommendation['sort']
+        key_schema.append({'AttributeName': sort_name, 'KeyType': 'RANGE'})
+        types[sort_name] = sort_type
+
+    # AttributeDefinitions 包含現有的鍵值屬性與新索引的鍵值屬性
+    types.update({a['AttributeName']: a['AttributeType'] for a in description['AttributeDefinitions']})
+    definitions = [{'AttributeName': name, 'AttributeType': attribute_type} for name, attribute_type in types.items()]
+
+    create = {
+        'IndexName': recommendation['IndexName'],
+        'KeySchema': key_schema,
+        'Projection': recommendation['Projection'],
+    }
+    if description.get('BillingModeSummary', {}).get('BillingMode') != 'PAY_PER_REQUEST':
+        throughput = description['ProvisionedThroughput']
+        create['ProvisionedThroughput'] = {
+            'ReadCapacityUnits': throughput['ReadCapacityUnits'],
+            'WriteCapacityUnits': throughput['WriteCapacityUnits']
+        }
+    return {
+        'AttributeDefinitions': definitions,
+        'GlobalSecondaryIndexUpdates': [{'Create': create}],
+    }
+
+
+# **線上建立 GSI** (DynamoDB 會在背景回填資料，完成前索引狀態為 CREATING)
+# 每次 UpdateTable 只能建立或刪除一個 GSI，回填中的 GSI 也不能再更新：先等表格與所有 GSI 都回到 ACTIVE
+# (client 為 operations.async_ops.async_client)；建立的索引記錄在 access_log，之後才會被建議刪除
+async def create_index_async(client, table_name, recommendation):
+    description = await wait_for_table_async(client, table_name, indexes=True)
+    await client.update_table(TableName=table_name, **create_index_args(description, recommendation))
+    access_log.record_index(table_name, recommendation['IndexName'])
+
+
+# **線上刪除 GSI**
+async def drop_index_async(client, table_name, name):
+    await wait_for_table_async(client, table_name, indexes=True)
+    await client.update_table(
+        TableName=table_name,
+        GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': name}}]
+    )
+    access_log.record_index(table_name, name, dropped=True)
@@ -0,0 +1,118 @@
+import os
+
+import pandas as pd
+
+from operations.convert import column_types, frame_to_items
+
+# 每次解析的 CSV 列數
+DEFAULT_CHUNK_ROWS = int(os.environ.get("DYNAMODB_INGEST_CHUNK_ROWS", "10000"))
+
+
+# 計算 CSV 資料列數 (不含標題列)，只逐行讀取不解析
+def count_rows(path):
+    with open(path, 'rb') as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+# CSV 中視為布林值的文字 (與 pandas.read_csv 相同)
+TRUE_VALUES = {'True', 'TRUE', 'true'}
+FALSE_VALUES = {'False', 'FALSE', 'false'}
+
+# 超過 18 位數的整數可能超出 Int64 的範圍，當作 float64
+INTEGER_PATTERN = r'[+-]?\d{1,18}'
+
+
+# 一個區塊中某個欄位 (已去除空值的文字) 的型別
+def _chunk_kind(values):
+    if values.isin(TRUE_VALUES | FALSE_VALUES).all():
+        return 'boolean'
+    if values.str.fullmatch(INTEGER_PATTERN).all():
+        return 'Int64'
+    if pd.to_numeric(values, errors='coerce').notna().all():
+        return 'float64'
+    return 'string'
+
+
+# 合併各區塊的型別：只有整數與小數時為 float64，其他混合一律為字串，全部為空值的欄位當作字串
+def _merge_kinds(kinds):
+    if len(kinds) == 1:
+        return next(iter(kinds))
+    if kinds == {'Int64', 'float64'}:
+        return 'float64'
+    return 'string'
+
+
+# **逐區塊掃描整個 CSV，決定每個欄位唯一的型別**
+# 建立表格前先讀完一次 (只以文字讀取，不保留資料)，之後每個區塊都轉成同一個型別，
+# 同一個屬性不會在不同區塊中分別存成 N 與 S，也不會在上傳到一半時才發現型別不符。
+# 回傳 {'schema': {欄位: 'boolean' / 'Int64' / 'float64' / 'string'}, 'rows': 資料列數, 'missing': {欄位: 空值數}}
+def profile_csv(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    kinds = {}
+    missing = {}
+    rows = 0
+    with pd.read_csv(path, chunksize=chunk_rows, dtype=str) as reader:
+        for chunk in reader:
+            rows += len(chunk)
+            for col in chunk.columns:
+                values = chunk[col].dropna().str.strip()
+                missing[col] = missing.get(col, 0) + len(chunk) - len(values)
+                seen = kinds.setdefault(col, set())
+                if not values.empty:
+                    seen.add(_chunk_kind(values))
+    schema = {col: _merge_kinds(seen) if seen else 'string' for col, seen in kinds.items()}
+    return {'schema': schema, 'rows': rows, 'missing': missing}
+
+
+def infer_schema(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    return profile_csv(path, chunk_rows)['schema']
+
+
+# 把區塊中的一個欄位 (文字) 轉成 schema 的型別 (profile_csv 已經確認整個檔案都可以轉換)
+def _cast(series, dtype):
+    if dtype == 'string':
+        return series.astype('string')
+    values = series.str.strip()
+    if dtype == 'boolean':
+        return values.isin(TRUE_VALUES).astype('boolean').where(values.notna(), pd.NA)
+    numbers = pd.to_numeric(values)
+    return numbers.astype(dtype)
+
+
+# **以固定大小的區塊讀取 CSV**
+# 整個檔案不會同時存在記憶體中，每個區塊都以文字讀取後轉成 schema 的型別 (保留字串欄位中 "007" 這類的值)
+def iter_csv_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS, schema=None):
+    schema = schema or infer_schema(path, chunk_rows)
+    with pd.read_csv(path, chunksize=chunk_rows, dtype=str) as reader:
+        for chunk in reader:
+            for col, dtype in schema.items():
+                if col in chunk.columns:
+                    chunk[col] = _cast(chunk[col], dtype)
+            yield chunk
+
+
+# 每個欄位的 DynamoDB 型別 (S / N / BOOL)
+def infer_types(path, chunk_rows=DEFAULT_CHUNK_ROWS, schema=None):
+    schema = schema or infer_schema(path, chunk_rows)
+    return column_types({col: pd.api.types.pandas_dtype(dtype) for col, dtype in schema.items()})
+
+
+# **逐區塊把 CSV 轉成 client 格式的項目**
+# 欄位的 DynamoDB 型別由整個檔案決定一次 (schema 為 profile_csv 的結果，沒有傳入時在這裡掃描)，
+# types 可以覆寫 (例如鍵值欄位必須是 S 或 N)；每個區塊整欄轉換，空值的屬性不寫入；
+# id_column 不為 None 時加上從 start_id 開始遞增的數字 ID。
+# on_chunk(DataFrame) 會在每個區塊轉換前呼叫 (例如 operations.rollups 在上傳時累計彙總)
+def iter_csv_items(path, chunk_rows=DEFAULT_CHUNK_ROWS, id_column=None, start_id=1, types=None, on_chunk=None,
+                   schema=None):
+    schema = schema or infer_schema(path, chunk_rows)
+    types = dict(infer_types(path, chunk_rows, schema), **(types or {}))
+    if id_column:
+        types[id_column] = 'N'
+
+    next_id = start_id
+    for chunk in iter_csv_chunks(path, chunk_rows, schema):
+        if id_column:
+            chunk[id_column] = range(next_id, next_id + len(chunk))
+            next_id += len(chunk)
+        if on_chunk:
+            on_chunk(chunk)
+        yield from frame_to_items(chunk, types)
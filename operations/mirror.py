@@ -0,0 +1,324 @@
+import functools
+import importlib.util
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from operations.cache import result_cache, describe_table
+from operations.convert import items_to_frame
+from operations.filters import parse_filter_query, filter_frame
+from operations.query import key_schemas
+from operations.dynamodb_ops import LazyConnection, scan_table, read_pages
+
+
+# pyarrow 為選用套件，沒有安裝時不使用本地鏡像；
+# 只在讀寫快照 / 匯出 Parquet 時才匯入，啟動時不載入 (operations.warmup 在背景預先匯入)
+@functools.lru_cache(maxsize=None)
+def pyarrow_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+# 鏡像檔案的資料夾，可用環境變數調整
+DEFAULT_MIRROR_DIR = os.environ.get("DYNAMODB_MIRROR_DIR", os.path.join(tempfile.gettempdir(), "dash_mirror"))
+
+# 要建立本地鏡像的表格 (逗號分隔，* 代表全部，空白代表不使用)
+MIRROR_TABLES = os.environ.get("DYNAMODB_MIRROR_TABLES", "")
+
+# 記錄最後更新時間的屬性 (用來增量更新)，以及距離上次更新多久 (秒) 後重新整理
+DEFAULT_UPDATED_AT = os.environ.get("DYNAMODB_MIRROR_UPDATED_AT", "updated_at")
+DEFAULT_MAX_AGE = float(os.environ.get("DYNAMODB_MIRROR_MAX_AGE", "3600"))
+
+# 增量更新無法得知被刪除的項目，超過這個時間 (秒) 改為完整重新載入
+DEFAULT_FULL_REFRESH = float(os.environ.get("DYNAMODB_MIRROR_FULL_REFRESH", "86400"))
+
+# 增量更新的變更來源：streams 為 DynamoDB Streams (StreamChangeFeed)，空白代表以 updated_at 掃描
+MIRROR_CHANGE_FEED = os.environ.get("DYNAMODB_MIRROR_CHANGE_FEED", "")
+
+
+# **DynamoDB Streams 的變更來源**
+# token 為 {shard_id: 最後讀到的 SequenceNumber}，回傳 (新增或修改的項目, 被刪除的鍵值, 新的 token)；
+# 表格必須開啟 Stream (StreamViewType 為 NEW_IMAGE 或 NEW_AND_OLD_IMAGES)
+class StreamChangeFeed:
+    def __init__(self, streams_client, dynamodb_client):
+        self.streams_client = streams_client
+        self.dynamodb_client = dynamodb_client
+
+    # 表格是否開啟了包含新項目的 Stream (沒有開啟時 TableMirror 改用 updated_at 掃描)
+    def available(self, table_name):
+        spec = describe_table(self.dynamodb_client, table_name).get('StreamSpecification', {})
+        return spec.get('StreamEnabled', False) and spec.get('StreamViewType') in ('NEW_IMAGE', 'NEW_AND_OLD_IMAGES')
+
+    def changes(self, table_name, token=None):
+        stream_arn = self.dynamodb_client.describe_table(TableName=table_name)['Table'].get('LatestStreamArn')
+        if not stream_arn:
+            raise RuntimeError(f"表格 '{table_name}' 沒有開啟 DynamoDB Streams")
+
+        token = dict(token or {})
+        upserts, deletes = [], []
+        shards = self.streams_client.describe_stream(StreamArn=stream_arn)['StreamDescription']['Shards']
+        for shard in shards:
+            shard_id = shard['ShardId']
+            if shard_id in token:
+                kwargs = {'ShardIteratorType': 'AFTER_SEQUENCE_NUMBER', 'SequenceNumber': token[shard_id]}
+            else:
+                kwargs = {'ShardIteratorType': 'TRIM_HORIZON'}
+            iterator = self.streams_client.get_shard_iterator(
+                StreamArn=stream_arn, ShardId=shard_id, **kwargs)['ShardIterator']
+
+            while iterator:
+                response = self.streams_client.get_records(ShardIterator=iterator)
+                for record in response['Records']:
+                    change = record['dynamodb']
+                    token[shard_id] = change['SequenceNumber']
+                    if record['eventName'] == 'REMOVE':
+                        deletes.append(change['Keys'])
+                    else:
+                        upserts.append(change['NewImage'])
+                # 已讀到目前最新的位置
+                if not response['Records']:
+                    break
+                iterator = response.get('NextShardIterator')
+
+        return upserts, deletes, token
+
+
+# **依 DYNAMODB_MIRROR_CHANGE_FEED 建立變更來源** (沒有設定時為 None)
+def change_feed_from_config(dynamodb_client, kind=MIRROR_CHANGE_FEED):
+    if kind == 'streams':
+        return StreamChangeFeed(LazyConnection('streams'), dynamodb_client)
+    if kind:
+        raise ValueError(f"不支援的 DYNAMODB_MIRROR_CHANGE_FEED: {kind}")
+    return None
+
+
+# Arrow 不接受混合型別的欄位 (例如 L / M 屬性)，轉成 JSON 字串
+def arrow_table(df):
+    import pyarrow as pa
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object and not df[col].map(lambda v: v is None or isinstance(v, str)).all():
+            df[col] = df[col].map(lambda v: None if v is None else json.dumps(v, ensure_ascii=False, default=str))
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+# 鍵值屬性的字串，用來合併增量更新 (同一個鍵值以新的資料為準)
+def _key_frame(df, key_names):
+    return df[key_names].astype(str).agg('\x1f'.join, axis=1)
+
+
+# 套用變更：刪除 deletes 的鍵值，upserts 取代相同鍵值的列 (同一個變更重複套用結果相同)
+def _apply_changes(df, upserts, deletes, key_names):
+    if not deletes.empty and not df.empty:
+        df = df[~_key_frame(df, key_names).isin(_key_frame(deletes, key_names))]
+    if not upserts.empty:
+        if not df.empty:
+            df = df[~_key_frame(df, key_names).isin(_key_frame(upserts, key_names))]
+        df = pd.concat([df, upserts], ignore_index=True)
+    return df
+
+
+# Query 的讀取參數轉成篩選條件 (在本地鏡像上執行)
+def _key_conditions(params, description):
+    if params.get('partition_value') in (None, ''):
+        return []
+    keys = key_schemas(description)[params.get('index') or '']
+    conditions = [(keys['partition'][0], 'eq', params['partition_value'], False)]
+    sort_values = [v for v in (params.get('sort_values') or []) if v not in (None, '')]
+    if keys['sort'] and params.get('sort_op') and sort_values:
+        sort_name = keys['sort'][0]
+        if params['sort_op'] == 'between':
+            conditions += [(sort_name, 'ge', sort_values[0], False), (sort_name, 'le', sort_values[-1], False)]
+        else:
+            conditions.append((sort_name, params['sort_op'], sort_values[0], False))
+    return conditions
+
+
+# **表格的本地鏡像 (選用功能)**
+# 每張表格的快照存成一個 Arrow IPC 檔 (<dir>/<table>/snapshot-<version>.arrow)，讀取時以 memory map 開啟，
+# 只讀取需要的欄位。快照超過 max_age 秒時重新整理：
+#   - 有 change_feed (StreamChangeFeed，DYNAMODB_MIRROR_CHANGE_FEED=streams) 且表格開啟了 Stream 時
+#     只讀取變更，不消耗表格的 RCU；
+#   - 否則以 updated_at 屬性大於上次最大值的 FilterExpression 掃描 (Scan 仍依讀取量計費，但只傳回變更的項目)；
+#   - 兩者都沒有，或超過 full_refresh 秒時，重新完整掃描。
+# 查看表格與匯出 CSV 都可以直接從鏡像讀取，篩選 / 排序 / 分頁都在本地執行
+class TableMirror:
+    def __init__(self, dynamodb_client, directory=DEFAULT_MIRROR_DIR, tables=MIRROR_TABLES,
+                 updated_at=DEFAULT_UPDATED_AT, max_age=DEFAULT_MAX_AGE, full_refresh=DEFAULT_FULL_REFRESH,
+                 change_feed=None):
+        self.dynamodb_client = dynamodb_client
+        self.directory = directory
+        self.tables = {name.strip() for name in tables.split(',') if name.strip()}
+        self.updated_at = updated_at
+        self.max_age = max_age
+        self.full_refresh = full_refresh
+        self.change_feed = change_feed
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    # 這張表格可以使用的變更來源 (沒有設定或表格沒有開啟 Stream 時為 None)
+    def _feed(self, table_name):
+        if self.change_feed is not None and self.change_feed.available(table_name):
+            return self.change_feed
+        return None
+
+    # 這張表格是否使用鏡像 (需要安裝 pyarrow 並在 DYNAMODB_MIRROR_TABLES 中列出)
+    def enabled(self, table_name):
+        return pyarrow_available() and ('*' in self.tables or table_name in self.tables)
+
+    def _lock(self, table_name):
+        with self._locks_lock:
+            return self._locks.setdefault(table_name, threading.Lock())
+
+    def _table_dir(self, table_name):
+        return os.path.join(self.directory, table_name)
+
+    def metadata(self, table_name):
+        try:
+            with open(os.path.join(self._table_dir(table_name), "meta.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # 快照版本 (每次重新整理加一)，可以當作快取 key 的一部分
+    def version(self, table_name):
+        meta = self.metadata(table_name)
+        return meta['version'] if meta else 0
+
+    def _snapshot_path(self, table_name, version):
+        return os.path.join(self._table_dir(table_name), f"snapshot-{version}.arrow")
+
+    def _read_snapshot(self, table_name, meta, columns=None):
+        import pyarrow as pa
+        with pa.memory_map(self._snapshot_path(table_name, meta['version'])) as source:
+            table = pa.ipc.open_file(source).read_all()
+            if columns:
+                table = table.select([c for c in columns if c in table.column_names])
+            return table.to_pandas()
+
+    def _write_snapshot(self, table_name, df, meta):
+        import pyarrow as pa
+        directory = self._table_dir(table_name)
+        os.makedirs(directory, exist_ok=True)
+        previous = meta.get('version', 0)
+        meta = dict(meta, version=previous + 1, refreshed=time.time())
+
+        temp_path = self._snapshot_path(table_name, meta['version']) + ".tmp"
+        table = arrow_table(df)
+        with pa.OSFile(temp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temp_path, self._snapshot_path(table_name, meta['version']))
+        self._write_metadata(table_name, meta)
+
+        # 舊的快照可能還有其他請求正在讀取 (memory map)，保留上一個版本
+        for name in os.listdir(directory):
+            if name.startswith("snapshot-") and name not in (
+                    f"snapshot-{meta['version']}.arrow", f"snapshot-{previous}.arrow"):
+                os.remove(os.path.join(directory, name))
+        result_cache.invalidate(table_name)
+        return meta
+
+    def _write_metadata(self, table_name, meta):
+        meta_path = os.path.join(self._table_dir(table_name), "meta.json")
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+        return meta
+
+    def _watermark(self, df):
+        if self.updated_at not in df.columns or df[self.updated_at].isna().all():
+            return None
+        value = df[self.updated_at].max()
+        return {'N': str(value)} if pd.api.types.is_numeric_dtype(df[self.updated_at].dtype) else {'S': str(value)}
+
+    # 完整掃描整張表格 (平行掃描，限制在表格 RCU 的一定比例內)
+    # 有 Stream 時先記下目前的位置再掃描，掃描完成後重新套用從那個位置之後的變更：
+    # 掃描期間寫入的項目不論有沒有被掃描讀到都不會遺漏 (重複套用同一個變更結果相同)
+    def _full_load(self, table_name, key_names):
+        feed = self._feed(table_name)
+        token = feed.changes(table_name)[2] if feed is not None else None
+        df = items_to_frame(scan_table(self.dynamodb_client, table_name))
+        meta = {'keys': key_names, 'loaded': time.time(), 'watermark': self._watermark(df)}
+        if feed is not None:
+            upserts, deletes, meta['token'] = feed.changes(table_name, token)
+            df = _apply_changes(df, items_to_frame(upserts), items_to_frame(deletes), key_names)
+        return df, meta
+
+    # 增量讀取變更，回傳 (新增或修改的 DataFrame, 被刪除的鍵值 DataFrame, 新的 meta)
+    def _changes(self, table_name, meta):
+        feed = self._feed(table_name)
+        if feed is not None and 'token' in meta:
+            upserts, deletes, token = feed.changes(table_name, meta['token'])
+            return items_to_frame(upserts), items_to_frame(deletes), dict(meta, token=token)
+
+        items = []
+        for page in read_pages(
+                self.dynamodb_client, table_name,
+                FilterExpression="#u > :u",
+                ExpressionAttributeNames={'#u': self.updated_at},
+                ExpressionAttributeValues={':u': meta['watermark']}):
+            items.extend(page)
+        upserts = items_to_frame(items)
+        watermark = self._watermark(upserts) or meta['watermark']
+        return upserts, pd.DataFrame(), dict(meta, watermark=watermark)
+
+    # **重新整理鏡像**，回傳新的 meta
+    def refresh(self, table_name, full=False):
+        with self._lock(table_name):
+            meta = self.metadata(table_name)
+            key_names = [k['AttributeName'] for k in describe_table(self.dynamodb_client, table_name)['KeySchema']]
+            incremental = (
+                not full and meta is not None
+                and time.time() - meta['loaded'] < self.full_refresh
+                and ((self._feed(table_name) is not None and 'token' in meta) or meta.get('watermark') is not None)
+            )
+            if not incremental:
+                df, new_meta = self._full_load(table_name, key_names)
+                return self._write_snapshot(table_name, df, dict(meta or {}, **new_meta))
+
+            upserts, deletes, meta = self._changes(table_name, meta)
+            if upserts.empty and deletes.empty:
+                # 沒有變更，快照不變，只更新重新整理的時間
+                return self._write_metadata(table_name, dict(meta, refreshed=time.time()))
+
+            df = _apply_changes(self._read_snapshot(table_name, meta), upserts, deletes, key_names)
+            return self._write_snapshot(table_name, df, meta)
+
+    # 取得最新的 meta，快照不存在或超過 max_age 時先重新整理
+    def ensure_fresh(self, table_name):
+        meta = self.metadata(table_name)
+        if meta is None or time.time() - meta['refreshed'] > self.max_age:
+            meta = self.refresh(table_name)
+        return meta
+
+    # **從鏡像讀取整張表格** (只讀取 columns 中的欄位)，結果依快照版本存在共用快取中
+    def frame(self, table_name, columns=None):
+        meta = self.ensure_fresh(table_name)
+        return result_cache.get_or_load(
+            (table_name, 'mirror', meta['version'], tuple(columns or ())),
+            lambda: self._read_snapshot(table_name, meta, columns)
+        )
+
+    # **依查看表格的讀取參數在鏡像上篩選與排序**
+    # params 與 operations.query.build_read 相同；回傳整個結果的 DataFrame (分頁由呼叫端切片)
+    def read(self, table_name, params=None):
+        params = params or {}
+        description = describe_table(self.dynamodb_client, table_name)
+        conditions = _key_conditions(params, description) + parse_filter_query(params.get('filter_query'))
+        needed = params.get('columns') or []
+        if needed:
+            needed = list(dict.fromkeys(list(needed) + [c[0] for c in conditions] +
+                                        [s['column_id'] for s in params.get('sort_by') or []]))
+
+        df = filter_frame(self.frame(table_name, needed or None), conditions)
+        for sort_by in (params.get('sort_by') or [])[:1]:
+            if sort_by['column_id'] in df.columns:
+                df = df.sort_values(sort_by['column_id'], ascending=sort_by['direction'] == 'asc',
+                                    na_position='last', kind='stable')
+        if params.get('columns'):
+            df = df[[c for c in params['columns'] if c in df.columns]]
+        return df.reset_index(drop=True)
@@ -0,0 +1,92 @@
+import json
+
+from operations.cache import result_cache
+from operations.scan import iter_pages
+
+
+# 將查詢參數轉成可以當作 key 的字串
+def query_shape(**kwargs):
+    return json.dumps(kwargs, sort_keys=True, default=str)
+
+
+# 讀取一頁資料 (最多 page_size 筆)，回傳 (items, next_key)
+# 遇到 1 MB 上限或篩選條件造成的短頁時會繼續往下讀，確保頁面筆數一致
+def _read_page(request, start_key, page_size, **kwargs):
+    items = []
+    next_key = start_key
+    while True:
+        params = dict(kwargs, Limit=page_size - len(items))
+        if next_key:
+            params['ExclusiveStartKey'] = next_key
+        response = request(**params)
+        items.extend(response.get('Items', []))
+        next_key = response.get('LastEvaluatedKey')
+        if not next_key or len(items) >= page_size:
+            return items, next_key
+
+
+# **取得第 page 頁 (從 0 開始)**
+# 如果沒有該頁的游標，從最近一個已知游標開始往後讀，並把經過的頁面都存入快取
+# 回傳 (items, has_more)
+def fetch_page(request, table_name, page, page_size, cache=result_cache, **kwargs):
+    shape = query_shape(**kwargs)
+
+    # 每一頁以 (表格, 'page', 查詢條件, 每頁筆數, 頁碼) 存在共用的結果快取中，
+    # 內容為 (該頁資料, 下一頁的 ExclusiveStartKey)
+    def key(n):
+        return (table_name, 'page', shape, page_size, n)
+
+    cached = cache.get(key(page))
+    if cached is not None:
+        return cached[0], cached[1] is not None
+
+    # 往前找最近一個知道起始游標的頁面
+    start = page
+    start_key = None
+    while start > 0:
+        previous = cache.get(key(start - 1))
+        if previous is not None:
+            start_key = previous[1]
+            if start_key is None:
+                # 前一頁已經是最後一頁
+                return [], False
+            break
+        start -= 1
+
+    items, next_key = [], start_key
+    for n in range(start, page + 1):
+        items, next_key = _read_page(request, start_key, page_size, TableName=table_name, **kwargs)
+        cache.put(key(n), (items, next_key))
+        if next_key is None:
+            if n < page:
+                return [], False
+            break
+        start_key = next_key
+
+    return items, next_key is not None
+
+
+# **依序讀取整張表格的所有頁面**
+# 先沿用快取中從第 0 頁開始連續的頁面 (例如使用者剛瀏覽過的頁面)，
+# 再從最後一個游標接著用一般的分頁掃描讀完剩下的資料
+def iter_table_pages(request, table_name, page_size=None, cache=result_cache, **kwargs):
+    shape = query_shape(**kwargs)
+    start_key = None
+
+    if page_size:
+        page = 0
+        while True:
+            cached = cache.get((table_name, 'page', shape, page_size, page))
+            if cached is None:
+                break
+            items, start_key = cached
+            yield items
+            if start_key is None:
+                return
+            page += 1
+
+    params = dict(kwargs, TableName=table_name)
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+    for response in iter_pages(request, **params):
+        yield response.get('Items', [])
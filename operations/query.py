@@ -0,0 +1,229 @@
+from operations.filters import parse_filter_query, filter_args, numeric_conditions
+from operations.paging import fetch_page
+
+# 排序鍵可以使用的條件
+SORT_KEY_OPERATORS = {
+    'eq': '=',
+    'lt': '<',
+    'le': '<=',
+    'gt': '>',
+    'ge': '>=',
+    'begins_with': 'begins_with',
+    'between': 'between',
+}
+
+# 取得屬性型別時讀取的筆數 (與查看表格的預設每頁筆數相同)
+SAMPLE_PAGE_SIZE = 10
+
+
+# **列出表格本身與所有可以查詢的索引的鍵結構**
+# 建立 (回填) 中或刪除中的 GSI 不能查詢，不列出。
+# 回傳 {索引名稱 ('' 代表表格本身): {'partition': (名稱, 型別), 'sort': (名稱, 型別) 或 None, 'projected': 屬性集合}}
+# projected 為索引中可以讀到的屬性，None 代表全部
+def key_schemas(description):
+    types = {a['AttributeName']: a['AttributeType'] for a in description['AttributeDefinitions']}
+    table_keys = {k['AttributeName'] for k in description['KeySchema']}
+
+    def keys(key_schema, projection=None):
+        hash_key = next(k['AttributeName'] for k in key_schema if k['KeyType'] == 'HASH')
+        range_key = next((k['AttributeName'] for k in key_schema if k['KeyType'] == 'RANGE'), None)
+        projected = None
+        if projection and projection['ProjectionType'] != 'ALL':
+            projected = table_keys | {hash_key, range_key} | set(projection.get('NonKeyAttributes', []))
+        return {
+            'partition': (hash_key, types[hash_key]),
+            'sort': (range_key, types[range_key]) if range_key else None,
+            'projected': projected
+        }
+
+    schemas = {'': keys(description['KeySchema'])}
+    for index in description.get('GlobalSecondaryIndexes', []) + description.get('LocalSecondaryIndexes', []):
+        if index.get('IndexStatus', 'ACTIVE') != 'ACTIVE':
+            continue
+        schemas[index['IndexName']] = keys(index['KeySchema'], index.get('Projection'))
+    return schemas
+
+
+# 從 client 格式的項目取得各屬性的型別 (S / N / B / BOOL ...)
+def attribute_types(items):
+    types = {}
+    for item in items:
+        for name, value in item.items():
+            types.setdefault(name, next(iter(value)))
+    return types
+
+
+# **篩選條件用的屬性型別**
+# 鍵值屬性取自 AttributeDefinitions，其他屬性取自表格第一頁 (與查看表格的第一頁共用快取)；
+# 沒有篩選條件時不讀取資料
+def filter_types(dynamodb_client, description, params, page_size=None):
+    types = {}
+    if (params or {}).get('filter_query'):
+        items, _ = fetch_page(dynamodb_client.scan, description['TableName'], 0, page_size or SAMPLE_PAGE_SIZE)
+        types = attribute_types(items)
+    types.update({a['AttributeName']: a['AttributeType'] for a in description['AttributeDefinitions']})
+    return types
+
+
+# 索引下拉選單的選項
+def index_options(description):
+    options = []
+    for name, keys in key_schemas(description).items():
+        label = f"{name or '表格本身'} ({keys['partition'][0]}"
+        label += f", {keys['sort'][0]})" if keys['sort'] else ")"
+        options.append({"label": label, "value": name})
+    return options
+
+
+# 依屬性型別把輸入的字串轉成 client 格式的值
+def attribute_value(value, attribute_type):
+    return {attribute_type: str(value)}
+
+
+# **組出 Query 的 KeyConditionExpression**
+# partition_value 必填；sort_op 為 SORT_KEY_OPERATORS 之一，between 需要兩個值
+def build_key_condition(keys, partition_value, sort_op=None, sort_values=()):
+    partition_name, partition_type = keys['partition']
+    expression = "#pk = :pk"
+    names = {'#pk': partition_name}
+    values = {':pk': attribute_value(partition_value, partition_type)}
+
+    sort_values = [v for v in (sort_values or []) if v not in (None, '')]
+    if sort_op and sort_values:
+        if keys['sort'] is None:
+            raise ValueError("此索引沒有排序鍵")
+        sort_name, sort_type = keys['sort']
+        names['#sk'] = sort_name
+
+        if sort_op == 'between':
+            if len(sort_values) < 2:
+                raise ValueError("between 需要兩個值")
+            expression += " AND #sk BETWEEN :sk1 AND :sk2"
+            values[':sk1'] = attribute_value(sort_values[0], sort_type)
+            values[':sk2'] = attribute_value(sort_values[1], sort_type)
+        elif sort_op == 'begins_with':
+            expression += " AND begins_with(#sk, :sk1)"
+            values[':sk1'] = attribute_value(sort_values[0], sort_type)
+        else:
+            expression += f" AND #sk {SORT_KEY_OPERATORS[sort_op]} :sk1"
+            values[':sk1'] = attribute_value(sort_values[0], sort_type)
+
+    return {
+        'KeyConditionExpression': expression,
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+    }
+
+
+# **只讀取指定的欄位 (ProjectionExpression)**
+# 欄位名稱一律透過 ExpressionAttributeNames 引用，避免與保留字衝突；回傳要合併到請求中的參數
+def projection_args(columns):
+    names = {f"#p{i}": column for i, column in enumerate(columns)}
+    return {
+        'ProjectionExpression': ", ".join(names),
+        'ExpressionAttributeNames': names,
+    }
+
+
+# 合併兩組請求參數 (ExpressionAttributeNames / Values 合併為同一個 dict)
+def merge_args(kwargs, extra):
+    merged = dict(kwargs)
+    for name, value in extra.items():
+        if name in ('ExpressionAttributeNames', 'ExpressionAttributeValues'):
+            merged[name] = {**merged.get(name, {}), **value}
+        else:
+            merged[name] = value
+    return merged
+
+
+# DataTable 篩選運算子中可以當作排序鍵條件的部分
+KEY_FILTER_OPERATORS = {'eq': 'eq', 'lt': 'lt', 'le': 'le', 'gt': 'gt', 'ge': 'ge', 'datestartswith': 'begins_with'}
+
+
+# **把 DataTable 的篩選條件中命中鍵值的部分轉成 Query 條件**
+# 目前為 Scan 時，找一個分割鍵有 eq 條件的索引 (優先使用表格本身) 改成 Query；
+# 只投影部分屬性的索引必須包含選擇的欄位與所有篩選的屬性 (沒有選擇欄位時只能使用 ALL 投影的索引)。
+# 命中該索引排序鍵的條件成為排序鍵條件。回傳 (新的 params, 剩下要放進 FilterExpression 的條件)
+def apply_key_conditions(params, conditions, description):
+    params = dict(params)
+    remaining = list(conditions)
+    schemas = key_schemas(description)
+    needed = set(params.get('columns') or []) | {c[0] for c in conditions}
+
+    if params.get('partition_value') in (None, ''):
+        for index, keys in schemas.items():
+            if keys['projected'] is not None and (not params.get('columns') or not needed <= keys['projected']):
+                continue
+            match = next((c for c in remaining if c[0] == keys['partition'][0] and c[1] == 'eq'), None)
+            if match:
+                remaining.remove(match)
+                params['index'] = index
+                params['partition_value'] = match[2]
+                params['sort_op'] = ''
+                break
+        else:
+            return params, remaining
+
+    keys = schemas[params.get('index') or '']
+    if keys['sort'] and not params.get('sort_op'):
+        match = next((c for c in remaining if c[0] == keys['sort'][0] and c[1] in KEY_FILTER_OPERATORS), None)
+        if match and not (match[1] == 'datestartswith' and keys['sort'][1] != 'S'):
+            remaining.remove(match)
+            params['sort_op'] = KEY_FILTER_OPERATORS[match[1]]
+            params['sort_values'] = [match[2]]
+
+    # Query 的 FilterExpression 不能使用鍵值屬性
+    key_names = {keys['partition'][0], keys['sort'][0] if keys['sort'] else None}
+    for column, operator, _, _ in remaining:
+        if column in key_names:
+            raise ValueError(f"鍵值屬性 '{column}' 的篩選條件 ({operator}) 無法與目前的查詢條件合併")
+
+    return params, remaining
+
+
+# **依讀取參數決定使用 Scan 或 Query**
+# params 為 {'index', 'partition_value', 'sort_op', 'sort_values', 'columns', 'filter_query', 'sort_by'}，
+# 沒有 partition_value 時為 Scan；有 columns 時只讀取這些欄位；
+# filter_query (DataTable 語法) 命中鍵值時成為 KeyConditionExpression，其餘成為 FilterExpression；
+# 依 Query 的排序鍵排序時使用 ScanIndexForward。
+# N 屬性的 contains 篩選改為等於 (operations.filters.numeric_conditions)，鍵值屬性因此也可以成為 Query 條件；
+# types 為 filter_types 的結果 (沒有傳入時在這裡取得)
+# 回傳 (request, kwargs)，request 為 dynamodb_client.scan 或 dynamodb_client.query
+def build_read(dynamodb_client, description, params, types=None):
+    params = params or {}
+    request, kwargs = dynamodb_client.scan, {}
+
+    if types is None:
+        types = filter_types(dynamodb_client, description, params)
+    conditions = numeric_conditions(parse_filter_query(params.get('filter_query')), types)
+    if conditions:
+        params, conditions = apply_key_conditions(params, conditions, description)
+
+    if params.get('partition_value') not in (None, ''):
+        index = params.get('index') or ''
+        request = dynamodb_client.query
+        kwargs = build_key_condition(
+            key_schemas(description)[index],
+            params['partition_value'],
+            params.get('sort_op'),
+            params.get('sort_values')
+        )
+        if index:
+            kwargs['IndexName'] = index
+
+    if params.get('columns'):
+        kwargs = merge_args(kwargs, projection_args(params['columns']))
+    if conditions:
+        kwargs = merge_args(kwargs, filter_args(conditions, types))
+
+    sort_by = (params.get('sort_by') or [None])[0]
+    if sort_by and request == dynamodb_client.query:
+        keys = key_schemas(description)[params.get('index') or '']
+        if keys['sort'] and sort_by['column_id'] == keys['sort'][0]:
+            kwargs['ScanIndexForward'] = sort_by['direction'] == 'asc'
+    return request, kwargs
+
+
+# 排序是否已經由 DynamoDB 處理 (否則只能在目前這一頁內排序)
+def sort_pushed_down(kwargs, params):
+    return bool(params.get('sort_by')) and 'ScanIndexForward' in kwargs
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import threading
+import time
+
+# 掃描 / 匯出與上傳預設可以使用的容量比例 (%)，可用環境變數調整
+DEFAULT_READ_PERCENT = float(os.environ.get("DYNAMODB_READ_PERCENT", "50"))
+DEFAULT_WRITE_PERCENT = float(os.environ.get("DYNAMODB_WRITE_PERCENT", "80"))
+
+
+# **Token bucket**
+# 每秒補充 rate 個 token，最多累積 burst 個。請求前等到餘額為正，
+# 請求後依回傳的 ConsumedCapacity 扣除實際用量 (餘額可以暫時為負，下一個請求會等待補回)
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.burst = rate
+
+    # 需要等待的秒數 (0 代表可以送出)
+    def _delay(self):
+        with self._lock:
+            self._refill()
+            if self._tokens > 0:
+                return 0
+            return -self._tokens / self.rate + 0.001
+
+    def wait(self):
+        delay = self._delay()
+        while delay:
+            time.sleep(delay)
+            delay = self._delay()
+
+    # asyncio 版本：等待時讓出 event loop，不佔用執行緒
+    async def wait_async(self):
+        delay = self._delay()
+        while delay:
+            await asyncio.sleep(delay)
+            delay = self._delay()
+
+    def consume(self, amount):
+        with self._lock:
+            self._refill()
+            self._tokens -= amount
+
+
+# 從回應中取出實際消耗的容量 (Scan/Query 為 dict，BatchWriteItem 為 list)
+def consumed_units(response):
+    consumed = response.get('ConsumedCapacity')
+    if consumed is None:
+        return 0
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    return sum(c.get('CapacityUnits', 0) for c in consumed)
+
+
+# **依表格容量限制請求速度**
+# wrap() 包裝 dynamodb_client.scan / query / batch_write_item，
+# 每次請求前等待 token，請求後依 ConsumedCapacity 扣除
+class CapacityLimiter:
+    def __init__(self, units_per_second):
+        self.bucket = TokenBucket(units_per_second)
+
+    def wrap(self, request):
+        def limited(**kwargs):
+            self.bucket.wait()
+            response = request(ReturnConsumedCapacity='TOTAL', **kwargs)
+            self.bucket.consume(consumed_units(response))
+            return response
+        return limited
+
+    # 包裝 async client (operations.async_ops) 的 scan / query / batch_write_item
+    def wrap_async(self, request):
+        async def limited(**kwargs):
+            await self.bucket.wait_async()
+            response = await request(ReturnConsumedCapacity='TOTAL', **kwargs)
+            self.bucket.consume(consumed_units(response))
+            return response
+        return limited
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+# **取得某張表格共用的限速器**
+# kind 為 'read' 或 'write'，速度為 DescribeTable 中的 RCU / WCU 乘上 percent%；
+# 同一張表格的所有掃描 / 上傳共用同一個 bucket。PAY_PER_REQUEST 的表格沒有容量上限，回傳 None
+def get_limiter(dynamodb_client, table_name, kind='read', percent=None):
+    description = dynamodb_client.describe_table(TableName=table_name)['Table']
+    return limiter_for(description, kind, percent)
+
+
+# 依 DescribeTable 的結果取得限速器 (async client 自己讀取 DescribeTable 後使用)
+def limiter_for(description, kind='read', percent=None):
+    if percent is None:
+        percent = DEFAULT_READ_PERCENT if kind == 'read' else DEFAULT_WRITE_PERCENT
+
+    table_name = description['TableName']
+    throughput = description.get('ProvisionedThroughput', {})
+    units = throughput.get('ReadCapacityUnits' if kind == 'read' else 'WriteCapacityUnits', 0)
+    if not units:
+        return None
+
+    rate = max(units * percent / 100, 1)
+    with _limiters_lock:
+        limiter = _limiters.get((table_name, kind))
+        if limiter is None:
+            limiter = _limiters[(table_name, kind)] = CapacityLimiter(rate)
+        elif limiter.bucket.rate != rate:
+            limiter.bucket.set_rate(rate)
+    return limiter
+
+
+# 有限速器時包裝 request，否則直接回傳原本的 request
+def limited(request, limiter):
+    return limiter.wrap(request) if limiter else request
+
+
+# async 版本 (request 為 async client 的方法)
+def limited_async(request, limiter):
+    return limiter.wrap_async(request) if limiter else request
@@ -0,0 +1,112 @@
+import json
+import os
+
+import pandas as pd
+
+from operations.bulk_load import bulk_write
+from operations.convert import frame_to_items
+
+# 預先宣告的彙總 (JSON)：{"表格名稱": [{"group_by": ["variety", "record_time"], "measures": ["height"]}], ...}
+# 上傳時沒有在畫面上選擇彙總欄位的表格使用這裡的設定
+DECLARED_ROLLUPS = json.loads(os.environ.get("DYNAMODB_ROLLUPS", "{}"))
+
+# 彙總表的名稱 (<表格>_summary) 與鍵值
+SUMMARY_SUFFIX = "_summary"
+ROLLUP_KEY = "rollup"
+GROUP_KEY = "group"
+
+
+def summary_table_name(table_name):
+    return f"{table_name}{SUMMARY_SUFFIX}"
+
+
+# 彙總的名稱，例如 "variety|record_time"，也是彙總表的 Partition Key
+def rollup_name(spec):
+    return "|".join(spec['group_by'])
+
+
+# 上傳的表格要計算的彙總 (畫面上的選擇優先，否則使用 DYNAMODB_ROLLUPS 的宣告)
+def rollups_for(table_name, group_by=None, measures=None):
+    if group_by:
+        return [{'group_by': list(group_by), 'measures': list(measures or [])}]
+    return DECLARED_ROLLUPS.get(table_name, [])
+
+
+# **上傳時逐區塊累計彙總**
+# update() 接收 CSV 的每個區塊 (DataFrame)，以 groupby 整區塊計算 count / sum / min / max，
+# 再與之前的部分結果合併；資料只會讀取一次，不需要在上傳後重新掃描表格
+class RollupAccumulator:
+    def __init__(self, specs):
+        self.specs = [dict(spec, measures=list(spec.get('measures') or [])) for spec in specs]
+        self._partials = [None] * len(self.specs)
+
+    def update(self, chunk):
+        for i, spec in enumerate(self.specs):
+            measures = [m for m in spec['measures'] if m in chunk.columns]
+            grouped = chunk.groupby(spec['group_by'], dropna=False)
+            partial = grouped.size().to_frame('count')
+            if measures:
+                values = chunk[measures].apply(pd.to_numeric, errors='coerce')
+                stats = values.groupby([chunk[col] for col in spec['group_by']], dropna=False).agg(
+                    ['count', 'sum', 'min', 'max'])
+                stats.columns = [f"{measure}_{name}" for measure, name in stats.columns]
+                partial = partial.join(stats)
+
+            if self._partials[i] is not None:
+                partial = pd.concat([self._partials[i], partial])
+                rules = {col: ('min' if col.endswith('_min') else 'max' if col.endswith('_max') else 'sum')
+                         for col in partial.columns}
+                partial = partial.groupby(level=list(range(partial.index.nlevels)), dropna=False).agg(rules)
+            self._partials[i] = partial
+
+    # **每個彙總的最終結果** (mean = sum / 非空值筆數)，回傳 [(spec, DataFrame), ...]
+    def results(self):
+        results = []
+        for spec, partial in zip(self.specs, self._partials):
+            if partial is None:
+                continue
+            result = partial.copy()
+            for measure in spec['measures']:
+                if f"{measure}_count" in result.columns:
+                    result[f"{measure}_mean"] = result[f"{measure}_sum"] / result[f"{measure}_count"]
+            results.append((spec, result.reset_index()))
+        return results
+
+
+# 彙總結果轉成彙總表的項目：Partition Key 為彙總名稱，Sort Key 為分組的值
+def summary_items(spec, result):
+    group_values = result[spec['group_by']].astype(object).where(result[spec['group_by']].notna(), '')
+    frame = result.copy()
+    frame[ROLLUP_KEY] = rollup_name(spec)
+    frame[GROUP_KEY] = group_values.astype(str).agg('|'.join, axis=1)
+    return frame_to_items(frame)
+
+
+# 建立彙總表 (PAY_PER_REQUEST，資料量只有分組數量) 並等待完成
+def create_summary_table(dynamodb_client, table_name):
+    name = summary_table_name(table_name)
+    dynamodb_client.create_table(
+        TableName=name,
+        KeySchema=[
+            {'AttributeName': ROLLUP_KEY, 'KeyType': 'HASH'},
+            {'AttributeName': GROUP_KEY, 'KeyType': 'RANGE'}
+        ],
+        AttributeDefinitions=[
+            {'AttributeName': ROLLUP_KEY, 'AttributeType': 'S'},
+            {'AttributeName': GROUP_KEY, 'AttributeType': 'S'}
+        ],
+        BillingMode='PAY_PER_REQUEST'
+    )
+    dynamodb_client.get_waiter('table_exists').wait(TableName=name)
+    return name
+
+
+# **把累計的彙總寫入彙總表**，回傳彙總表名稱 (沒有彙總時回傳 None)
+def write_rollups(dynamodb_client, table_name, accumulator):
+    results = accumulator.results()
+    if not results:
+        return None
+    name = create_summary_table(dynamodb_client, table_name)
+    for spec, result in results:
+        bulk_write(dynamodb_client, name, summary_items(spec, result))
+    return name
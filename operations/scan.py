@@ -0,0 +1,47 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# 平行掃描的預設分段數與執行緒數量，可用環境變數調整
+DEFAULT_TOTAL_SEGMENTS = int(os.environ.get("DYNAMODB_SCAN_SEGMENTS", "8"))
+DEFAULT_MAX_WORKERS = int(os.environ.get("DYNAMODB_SCAN_WORKERS", "8"))
+
+
+# 依照 LastEvaluatedKey 逐頁呼叫 request，直到沒有下一頁為止
+# request 可以是 dynamodb_client.scan 或 dynamodb_client.query
+def iter_pages(request, **kwargs):
+    while True:
+        response = request(**kwargs)
+        yield response
+
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+# 掃描單一分段 (Segment) 的所有頁面
+def scan_segment(scan, segment, total_segments, **kwargs):
+    items = []
+    for page in iter_pages(scan, Segment=segment, TotalSegments=total_segments, **kwargs):
+        items.extend(page.get('Items', []))
+    return items
+
+
+# **平行掃描整張表格**
+# 把表格切成 total_segments 個分段，交給最多 max_workers 個執行緒同時掃描，
+# 每個分段都會完整跟隨分頁，最後依分段順序合併結果
+def parallel_scan(scan, total_segments=None, max_workers=None, **kwargs):
+    total_segments = total_segments or DEFAULT_TOTAL_SEGMENTS
+    max_workers = min(max_workers or DEFAULT_MAX_WORKERS, total_segments)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(scan_segment, scan, segment, total_segments, **kwargs)
+            for segment in range(total_segments)
+        ]
+        items = []
+        for future in futures:
+            items.extend(future.result())
+
+    return items
+
@@ -0,0 +1,120 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+# 暫存上傳檔案的資料夾與保存時間 (秒)
+DEFAULT_STAGING_DIR = os.environ.get("DYNAMODB_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "dash_uploads"))
+DEFAULT_TTL = float(os.environ.get("DYNAMODB_UPLOAD_TTL", "3600"))
+
+
+# **伺服器端上傳暫存區**
+# 上傳的檔案以 upload ID 存在磁碟上 (<id>.csv 與 <id>.json 中繼資料)，
+# 瀏覽器只需要保存 upload ID，寫入 DynamoDB 時直接讀取暫存檔。
+# 分段上傳 (operations.uploads) 以 append() 依序寫入，目前的檔案大小就是可以續傳的位置。
+# 多個 worker 行程共用同一個資料夾，超過保存時間的檔案會被清除
+class UploadStore:
+    def __init__(self, directory=DEFAULT_STAGING_DIR, ttl=DEFAULT_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, upload_id, suffix):
+        # upload ID 由 uuid4().hex 產生，只接受十六進位字元，避免路徑穿越
+        if not upload_id or not all(c in "0123456789abcdef" for c in upload_id):
+            raise KeyError(upload_id)
+        return os.path.join(self.directory, f"{upload_id}{suffix}")
+
+    # 建立新的上傳，回傳 upload ID (size 為分段上傳時檔案的總大小)
+    def create(self, filename, size=None):
+        self.purge_expired()
+        upload_id = uuid.uuid4().hex
+        with open(self._path(upload_id, ".json"), "w", encoding="utf-8") as f:
+            json.dump({"filename": filename, "size": size, "created": time.time()}, f)
+        open(self._path(upload_id, ".csv"), "wb").close()
+        return upload_id
+
+    # 把內容 (bytes、可讀取的檔案物件或 bytes 區塊的 iterable) 存成暫存檔
+    def save(self, content, filename):
+        upload_id = self.create(filename)
+        with open(self._path(upload_id, ".csv"), "wb") as f:
+            if isinstance(content, (bytes, bytearray)):
+                f.write(content)
+            elif hasattr(content, "read"):
+                shutil.copyfileobj(content, f)
+            else:
+                for block in content:
+                    f.write(block)
+        return upload_id
+
+    # **從 offset 開始寫入一段內容** (stream 為可讀取的檔案物件)，回傳寫入後的大小
+    # offset 必須等於目前已收到的大小 (重送或遺失區塊時 ValueError，用戶端再從 received() 續傳)
+    def append(self, upload_id, offset, stream, block=1024 * 1024):
+        path = self.path(upload_id)
+        size = self.metadata(upload_id).get("size")
+        with open(path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() != offset:
+                raise ValueError(f"offset {offset} 與已收到的 {f.tell()} bytes 不一致")
+            while True:
+                data = stream.read(block)
+                if not data:
+                    break
+                if size is not None and f.tell() + len(data) > size:
+                    f.truncate(offset)
+                    raise ValueError("上傳的內容超過檔案大小")
+                f.write(data)
+            return f.tell()
+
+    # 已收到的大小
+    def received(self, upload_id):
+        return os.path.getsize(self.path(upload_id))
+
+    # 分段上傳是否已收到完整的檔案
+    def complete(self, upload_id):
+        size = self.metadata(upload_id).get("size")
+        return size is None or self.received(upload_id) == size
+
+    def path(self, upload_id):
+        path = self._path(upload_id, ".csv")
+        if not os.path.exists(path):
+            raise KeyError(upload_id)
+        return path
+
+    def metadata(self, upload_id):
+        with open(self._path(upload_id, ".json"), encoding="utf-8") as f:
+            return json.load(f)
+
+    def discard(self, upload_id):
+        for suffix in (".csv", ".json"):
+            try:
+                os.remove(self._path(upload_id, suffix))
+            except (FileNotFoundError, KeyError):
+                pass
+
+    # **清除超過保存時間的上傳**
+    # 以 <id>.csv 與 <id>.json 中較新的修改時間為準 (append 只會更新 .csv)，兩個檔案一起刪除；
+    # 上傳中或剛上傳完成的檔案不會因為建立時間較早而失去中繼資料
+    def purge_expired(self):
+        deadline = time.time() - self.ttl
+        uploads = {}
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                mtime = os.path.getmtime(path)
+            except FileNotFoundError:
+                continue
+            uploads.setdefault(os.path.splitext(name)[0], []).append((path, mtime))
+
+        for files in uploads.values():
+            if max(mtime for _, mtime in files) < deadline:
+                for path, _ in files:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+
+
+upload_store = UploadStore()
@@ -0,0 +1,102 @@
+// 分段上傳 (operations/uploads.py)：選擇檔案後以 PATCH /upload/<id> 依序送出原始 bytes，
+// 不經過 base64 與 Dash 回調。upload ID 記在 localStorage，中斷後選擇同一個檔案會從伺服器已收到的位置續傳。
+(function () {
+    var MAX_RETRIES = 5;
+
+    function setProps(id, props) {
+        if (window.dash_clientside && window.dash_clientside.set_props) {
+            window.dash_clientside.set_props(id, props);
+        }
+    }
+
+    function resumeKey(file) {
+        return 'chunked-upload:' + [file.name, file.size, file.lastModified].join(':');
+    }
+
+    function sleep(ms) {
+        return new Promise(function (resolve) { setTimeout(resolve, ms); });
+    }
+
+    // 取得可以續傳的上傳 (伺服器上已過期時重新建立)
+    async function begin(file) {
+        var key = resumeKey(file);
+        var uploadId = localStorage.getItem(key);
+        if (uploadId) {
+            var existing = await fetch('/upload/' + uploadId);
+            if (existing.ok) {
+                return await existing.json();
+            }
+            localStorage.removeItem(key);
+        }
+        var created = await fetch('/upload', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({filename: file.name, size: file.size})
+        });
+        if (!created.ok) {
+            throw new Error((await created.json()).error || created.statusText);
+        }
+        var state = await created.json();
+        localStorage.setItem(key, state.upload_id);
+        return state;
+    }
+
+    // 送出一個區塊；409 代表位置不一致，回傳伺服器目前的 offset 繼續
+    async function sendChunk(file, state, chunkSize) {
+        var end = Math.min(state.offset + chunkSize, file.size);
+        var response = await fetch('/upload/' + state.upload_id, {
+            method: 'PATCH',
+            headers: {'Upload-Offset': String(state.offset), 'Content-Type': 'application/octet-stream'},
+            body: file.slice(state.offset, end)
+        });
+        if (!response.ok && response.status !== 409) {
+            throw new Error((await response.json()).error || response.statusText);
+        }
+        return await response.json();
+    }
+
+    async function upload(input) {
+        var file = input.files[0];
+        var storeId = input.dataset.store;
+        var progressId = storeId + '-progress';
+        var chunkSize = parseInt(input.dataset.chunk, 10) || 8 * 1024 * 1024;
+        if (!file) {
+            return;
+        }
+
+        try {
+            var state = await begin(file);
+            var retries = 0;
+            while (!state.complete) {
+                setProps(progressId, {
+                    children: '上傳中 ' + Math.floor(state.offset * 100 / Math.max(file.size, 1)) + '%'
+                });
+                try {
+                    state = await sendChunk(file, state, chunkSize);
+                    retries = 0;
+                } catch (error) {
+                    // 網路中斷時稍後重試，先向伺服器確認已收到的位置
+                    if (++retries > MAX_RETRIES) {
+                        throw error;
+                    }
+                    await sleep(1000 * retries);
+                    var current = await fetch('/upload/' + state.upload_id).catch(function () { return null; });
+                    if (current && current.ok) {
+                        state = await current.json();
+                    }
+                }
+            }
+            localStorage.removeItem(resumeKey(file));
+            setProps(progressId, {children: '上傳完成'});
+            setProps(storeId, {data: {upload_id: state.upload_id, filename: state.filename, size: state.size}});
+        } catch (error) {
+            setProps(progressId, {children: '上傳失敗: ' + error.message + ' (重新選擇檔案可以續傳)'});
+        }
+    }
+
+    document.addEventListener('change', function (event) {
+        if (event.target.matches && event.target.matches('input.chunked-upload')) {
+            upload(event.target);
+        }
+    });
+})();
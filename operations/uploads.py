@@ -0,0 +1,76 @@
+import os
+
+from dash import html, dcc
+from flask import jsonify, request, send_from_directory
+
+from operations.staging import upload_store
+
+# 瀏覽器每次送出的區塊大小，以及伺服器接受的單一區塊上限 (MB)
+DEFAULT_CHUNK_MB = int(os.environ.get("DYNAMODB_UPLOAD_CHUNK_MB", "8"))
+MAX_CHUNK_MB = int(os.environ.get("DYNAMODB_UPLOAD_MAX_CHUNK_MB", "64"))
+
+# 分段上傳的前端程式 (由 register_upload_routes 提供，各個 app 以 external_scripts 載入)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+UPLOAD_SCRIPT = "/upload/chunked_upload.js"
+
+
+# **分段上傳的元件**
+# 選擇檔案後由 chunked_upload.js 分段送到 /upload，完成後把
+# {'upload_id', 'filename', 'size'} 寫入 dcc.Store(id=store_id)，回調只會收到這個 upload ID，不會收到檔案內容。
+# 上傳進度顯示在 <store_id>-progress；中斷後重新選擇同一個檔案會從已收到的位置續傳
+def upload_input(store_id, accept=".csv", **style):
+    return html.Div([
+        dcc.Store(id=store_id),
+        html.Input(type="file", accept=accept, className="chunked-upload",
+                   **{"data-store": store_id, "data-chunk": str(DEFAULT_CHUNK_MB * 1024 * 1024)}),
+        html.Div(id=f"{store_id}-progress", className="mt-1")
+    ], style=style or None)
+
+
+# **在 Dash 的 Flask 伺服器上註冊分段上傳路由** (直接寫入伺服器端暫存區 operations.staging)
+# POST  /upload            {"filename", "size"} -> {"upload_id", "offset": 0}
+# GET   /upload/<id>       -> {"upload_id", "filename", "size", "offset", "complete"} (續傳前查詢已收到的位置)
+# PATCH /upload/<id>       Upload-Offset: <位置>，內容為這一段的原始 bytes -> {"offset", "complete"}
+#                          位置不一致時回傳 409 與目前的 offset
+def register_upload_routes(server, store=upload_store):
+    def status(upload_id, code=200):
+        metadata = store.metadata(upload_id)
+        return jsonify(upload_id=upload_id, filename=metadata["filename"], size=metadata.get("size"),
+                       offset=store.received(upload_id), complete=store.complete(upload_id)), code
+
+    @server.route(UPLOAD_SCRIPT)
+    def chunked_upload_script():
+        return send_from_directory(STATIC_DIR, "chunked_upload.js", mimetype="application/javascript")
+
+    @server.route("/upload", methods=["POST"])
+    def create_upload():
+        body = request.get_json(silent=True) or {}
+        filename = os.path.basename(str(body.get("filename") or ""))
+        size = body.get("size")
+        if not filename or not isinstance(size, int) or size < 0:
+            return jsonify(error="需要 filename 與 size"), 400
+        return status(store.create(filename, size), 201)
+
+    @server.route("/upload/<upload_id>", methods=["GET"])
+    def upload_status(upload_id):
+        try:
+            return status(upload_id)
+        except (KeyError, OSError):
+            return jsonify(error="找不到這個上傳"), 404
+
+    @server.route("/upload/<upload_id>", methods=["PATCH"])
+    def upload_chunk(upload_id):
+        offset = request.headers.get("Upload-Offset", type=int)
+        if offset is None:
+            return jsonify(error="需要 Upload-Offset"), 400
+        if (request.content_length or 0) > MAX_CHUNK_MB * 1024 * 1024:
+            return jsonify(error=f"區塊不能超過 {MAX_CHUNK_MB} MB"), 413
+        try:
+            store.append(upload_id, offset, request.stream)
+        except (KeyError, OSError):
+            return jsonify(error="找不到這個上傳"), 404
+        except ValueError:
+            return status(upload_id, 409)
+        return status(upload_id)
+
+    return upload_chunk
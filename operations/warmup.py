@@ -0,0 +1,71 @@
+import importlib
+import threading
+import time
+
+from flask import jsonify
+
+
+# **背景預熱**
+# 啟動時不執行較慢的工作 (匯入大型套件、讀取 AWS 憑證建立 client)，改由背景執行緒依序執行；
+# worker 可以立即開始處理請求，第一次使用時不需要等待
+class Warmup:
+    def __init__(self):
+        self._tasks = []
+        self._status = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, name, task):
+        self._tasks.append((name, task))
+        self._status[name] = {'state': 'pending'}
+        return self
+
+    # 啟動背景執行緒 (重複呼叫不會建立第二個執行緒)
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def _set(self, name, **state):
+        with self._lock:
+            self._status[name] = state
+
+    def _run(self):
+        for name, task in self._tasks:
+            started = time.monotonic()
+            self._set(name, state='running')
+            try:
+                task()
+                self._set(name, state='ready', seconds=round(time.monotonic() - started, 3))
+            except Exception as e:
+                self._set(name, state='failed', error=str(e), seconds=round(time.monotonic() - started, 3))
+
+    def status(self):
+        with self._lock:
+            tasks = {name: dict(state) for name, state in self._status.items()}
+        return {'ready': all(state['state'] == 'ready' for state in tasks.values()), 'tasks': tasks}
+
+
+# 預先匯入選用套件 (沒有安裝的直接略過)
+def import_modules(*names):
+    def task():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                pass
+    return task
+
+
+# **在 Dash 的 Flask 伺服器上註冊就緒檢查路由**
+# checks 為 {名稱: 有 status() 的物件 (Warmup、operations.catalog.TableCatalog)}，status() 回傳含 'ready' 的 dict
+# GET /ready -> 全部就緒時 200，否則 503；內容為每個項目的狀態 (負載平衡器 / 自動擴展以此判斷 worker 是否可以接收流量)
+def register_readiness_route(server, path="/ready", **checks):
+    @server.route(path)
+    def readiness():
+        status = {name: check.status() for name, check in checks.items()}
+        ready = all(state['ready'] for state in status.values())
+        return jsonify(ready=ready, **status), 200 if ready else 503
+
+    return readiness